@@ -0,0 +1,202 @@
+"""
+Run the analysis from the command line without Jupyter.
+
+    python -m analysis cards --two-dice
+    python -m analysis strategies --players 2 4
+    python -m analysis trace highest_margin --players 4
+    python -m analysis rolls dice_rolls.tsv --plot rolls.png
+    python -m analysis serve --port 8765
+    python -m analysis report reports/
+
+Tables are printed as plain text, CSV or JSON.
+pandas and matplotlib are only imported by the commands that need them,
+so short queries start quickly enough to run from scripts.
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+from typing import Any, List, Optional, Sequence
+
+def _format_cell(value: Any) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+def print_table(headers: Sequence[str], rows: List[Sequence[Any]], output_format: str = "text", file=None) -> None:
+    """
+    Print a table of rows.
+
+    output_format -- "text" for aligned columns, "csv", or "json" for a list of objects.
+    """
+    file = file or sys.stdout
+    if output_format == "csv":
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        writer.writerows(rows)
+    elif output_format == "json":
+        json.dump([dict(zip(headers, row)) for row in rows], file, indent=2, default=str)
+        file.write("\n")
+    else:
+        cells = [list(headers)] + [[_format_cell(value) for value in row] for row in rows]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+        for row in cells:
+            file.write("  ".join(cell.rjust(width) for cell, width in zip(row, widths)).rstrip() + "\n")
+
+def _separate_tables(output_format: str) -> None:
+    if output_format == "text":
+        print()
+
+def _dice_model(name: str):
+    from .dice import FAIR, empirical
+
+    if name == "fair":
+        return FAIR
+    from .rolls import summarize
+    return empirical(summarize(name))
+
+def _cards(args) -> None:
+    from .cards import fastest_payoff, reference_hand, sweep
+    from machi_koro import cards
+
+    hand = reference_hand()
+    scenarios = sweep(hand.counts, num_players=(2, 3, 4), two_dice=(args.two_dice,), dice=_dice_model(args.dice))
+    payoff = scenarios.expected_payoff()
+    rows = [
+        [card.name]
+        + [float(scenarios.expected_value[0, j, 0, i]) for j in range(3)]
+        + [fastest_payoff(card, hand, num_players=4), float(payoff[0, 2, 0, i])]
+        for i, card in enumerate(cards.distinct_cards)
+    ]
+    print_table(
+        ["Card", "Expected coins per roll (2p)", "Expected coins per roll (3p)", "Expected coins per roll (4p)",
+         "Minimum rolls for payoff (4p)", "Expected rolls for payoff (4p)"],
+        rows, args.format)
+
+def _strategies(args) -> None:
+    from .strategies import NAMED_STRATEGIES, simulate
+
+    dice = _dice_model(args.dice)
+    rows = []
+    for name, strategy in NAMED_STRATEGIES.items():
+        for num_players in args.players:
+            summary = simulate(strategy(), num_players, log="summary", dice=dice)
+            rows.append([name, num_players, summary.rounds_to_win, summary.max_expected_coins_per_roll,
+                         " ".join(str(n) for n in sorted(summary.scores_on))])
+    print_table(["Name", "# Players", "Exp. Rounds to Win", "Max Exp. Coins/Roll", "Scores On"], rows, args.format)
+
+def _trace(args) -> None:
+    from .strategies import NAMED_STRATEGIES, GameLog, simulate
+    from machi_koro import cards
+
+    game_log = simulate(NAMED_STRATEGIES[args.strategy](), args.players, log="array", dice=_dice_model(args.dice))
+    rows = [
+        [int(row["Round"]), int(row["Turn"]) or None, float(row["Coins"]), float(row["Expected Coins per Roll"]),
+         int(row["# Cards"]), int(row["# Victory Cards"]),
+         cards.distinct_cards[row["Bought Card"]].name if row["Bought Card"] >= 0 else None]
+        for row in game_log.rows
+    ]
+    print_table(list(GameLog.DTYPE.names), rows, args.format)
+
+def _rolls(args) -> None:
+    from .dice import FACES
+    from .rolls import summarize
+
+    statistics = summarize(args.filename)
+    print_table(
+        ["Face"] + statistics.dice,
+        [[face] + [int(n) for n in statistics.face_counts[:, face]] for face in range(1, FACES + 1)],
+        args.format)
+    _separate_tables(args.format)
+    print_table(
+        ["Sum", "Rolls"],
+        [[total, int(statistics.sum_counts[total])] for total in range(len(statistics.dice), len(statistics.sum_counts))],
+        args.format)
+    _separate_tables(args.format)
+    tests = [(die, *statistics.chi_square(die)) for die in statistics.dice] + [("Sum", *statistics.sum_chi_square())]
+    print_table(["Test", "Chi-Square", "p-value"], tests, args.format)
+
+    if args.plot:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        statistics.frequencies().plot.bar()
+        plt.ylabel("Number of rolls")
+        plt.grid()
+        plt.savefig(args.plot)
+
+def _serve(args) -> None:
+    from .advisor import serve
+
+    serve(args.host, args.port)
+
+def _report(args) -> None:
+    from .report import export
+
+    for path in export(args.directory, args.players, args.games, args.seed, parquet=not args.no_parquet):
+        print(path)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m analysis", description="Mathematical analysis of Machi Koro.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_subparser(name: str, help: str) -> argparse.ArgumentParser:
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.add_argument("--format", choices=["text", "csv", "json"], default="text", help="How to print tables.")
+        return subparser
+
+    def add_dice_argument(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("--dice", default="fair",
+                               help='"fair", or a dice log in the data directory to use the recorded dice.')
+
+    cards_parser = add_subparser("cards", "Expected value and payoff of each card.")
+    cards_parser.add_argument("--two-dice", action="store_true", help="Roll two dice.")
+    add_dice_argument(cards_parser)
+    cards_parser.set_defaults(run=_cards)
+
+    strategies_parser = add_subparser("strategies", "Rounds to win for each named strategy.")
+    strategies_parser.add_argument("--players", type=int, nargs="+", default=[2, 3, 4], choices=[2, 3, 4])
+    add_dice_argument(strategies_parser)
+    strategies_parser.set_defaults(run=_strategies)
+
+    trace_parser = add_subparser("trace", "The turn-by-turn simulation of one strategy.")
+    trace_parser.add_argument("strategy", help="The name of a strategy, such as highest_margin.")
+    trace_parser.add_argument("--players", type=int, default=4, choices=[2, 3, 4])
+    add_dice_argument(trace_parser)
+    trace_parser.set_defaults(run=_trace)
+
+    rolls_parser = add_subparser("rolls", "Frequencies and fairness tests for a dice log.")
+    rolls_parser.add_argument("filename", nargs="?", default="dice_rolls.tsv",
+                              help="A TSV or .npy dice log in the data directory.")
+    rolls_parser.add_argument("--plot", help="Save a bar chart of the frequencies to this file.")
+    rolls_parser.set_defaults(run=_rolls)
+
+    serve_parser = subparsers.add_parser("serve", help="Answer what to buy over HTTP during a live game.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.set_defaults(run=_serve)
+
+    report_parser = subparsers.add_parser("report", help="Write every table to HTML and Parquet files.")
+    report_parser.add_argument("directory", help="Where to write the files.")
+    report_parser.add_argument("--players", type=int, default=4, choices=[2, 3, 4], help="Players in the traces.")
+    report_parser.add_argument("--games", type=int, default=0,
+                               help="Monte Carlo games for each strategy in the summary, or 0 for none.")
+    report_parser.add_argument("--seed", type=int)
+    report_parser.add_argument("--no-parquet", action="store_true", help="Only write HTML, which doesn't need pyarrow.")
+    report_parser.set_defaults(run=_report)
+
+    args = parser.parse_args(argv)
+    if args.command == "trace":
+        from .strategies import NAMED_STRATEGIES
+        if args.strategy not in NAMED_STRATEGIES:
+            parser.error(f"unknown strategy {args.strategy!r}; choose from {', '.join(NAMED_STRATEGIES)}")
+    args.run(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
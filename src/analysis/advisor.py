@@ -0,0 +1,253 @@
+"""
+Advise what to buy during a live game, over a local HTTP/JSON service.
+
+Ask with the cards you hold, your coins and the number of players:
+
+    POST /advice
+    {"hand": {"Wheat Field": 1, "Bakery": 1, "Ranch": 2}, "coins": 7, "players": 4}
+
+and get back whether to roll two dice, what to buy, and the estimated rounds left to win after each choice:
+
+    {"roll_two": false, "buy": "Forest", "expected_coins_per_round": 4.25,
+     "options": [{"card": "Forest", "rounds_to_win": 17}, ..., {"card": null, "rounds_to_win": 19}]}
+
+Each choice is scored by buying that card now and then saving for the missing victory cards,
+cheapest first, at the expected income of `strategies.simulate`.
+Every choice is scored at once with NumPy arrays, in 36ths of a coin so the rounds are counted exactly.
+The tables for each player count are built when the service starts, and recent answers are cached,
+so each query takes well under a millisecond and is answered right on the event loop.
+"""
+import asyncio
+import functools
+import json
+
+import numpy as np
+
+from .search import Incomes
+from .strategies import MAX_ROUNDS, VICTORY_CARDS
+from dataclasses import dataclass
+from machi_koro import cards
+from machi_koro.cards import SUPPLY_LIMITS
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_VICTORY_IDS = np.array([cards.card_id(c) for c in VICTORY_CARDS])
+_TRAIN_STATION = cards.card_id(cards.TrainStation())
+_COST = np.array([card.cost * 36 for card in cards.distinct_cards], dtype=np.int64)
+# The victory cards from cheapest to most expensive.
+_VICTORY_ORDER = np.array(sorted(_VICTORY_IDS, key=lambda i: _COST[i]))
+
+class AdviceError(ValueError):
+    """An exception raised for a query that doesn't describe a possible game state."""
+
+@dataclass
+class Advice:
+    """
+    What to do on your turn.
+
+    buy -- The card to buy, or None to save your coins.
+    expected_coins_per_round -- Your expected income over the next round with the dice you should roll.
+    options -- Each card you could buy, or None for saving, with the estimated rounds to win after this one if you do.
+    """
+    roll_two: bool
+    buy: Optional[cards.Card]
+    expected_coins_per_round: float
+    options: List[Tuple[Optional[cards.Card], int]]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "roll_two": self.roll_two,
+            "buy": self.buy.name if self.buy is not None else None,
+            "expected_coins_per_round": self.expected_coins_per_round,
+            "options": [
+                {"card": card.name if card is not None else None, "rounds_to_win": rounds}
+                for card, rounds in self.options
+            ]
+        }
+
+class Advisor:
+    """The tables to advise a player in a game with `num_players` players."""
+    def __init__(self, num_players: int):
+        if not (2 <= num_players <= 4):
+            raise ValueError()
+        self.num_players = num_players
+        self.incomes = Incomes(num_players)
+
+    def _incomes(self, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Whether to roll two dice and the expected income over a round, in 36ths of a coin, for each hand."""
+        one_die, two_dice, other_turn = self.incomes.by_dice(counts).T
+        roll_two = (counts[:, _TRAIN_STATION] > 0) & (two_dice > one_die)
+        return roll_two, np.where(roll_two, two_dice, one_die) + (self.num_players - 1) * other_turn
+
+    def _rounds_to_win(self, counts: np.ndarray, coins: np.ndarray) -> np.ndarray:
+        """
+        Estimate the rounds after this one it takes each hand to win
+        by saving for the missing victory cards, cheapest first.
+        """
+        # The hands along the way: after buying none of the missing victory cards, then the cheapest, and so on.
+        missing = counts[:, _VICTORY_ORDER] == 0
+        rank = np.cumsum(missing, axis=1)
+        stages = np.repeat(counts[np.newaxis], len(_VICTORY_ORDER), axis=0)
+        stages[:, :, _VICTORY_ORDER] += missing & (rank <= np.arange(len(_VICTORY_ORDER))[:, np.newaxis, np.newaxis])
+        # Work out every income in one go rather than one stage at a time.
+        _, incomes = self._incomes(stages.reshape(-1, cards.NUM_DISTINCT_CARDS))
+        incomes = incomes.reshape(len(_VICTORY_ORDER), len(counts))
+
+        # The cost of the victory card bought at each stage, or 0 once there are none left to buy.
+        buying = missing & (rank == np.arange(1, len(_VICTORY_ORDER) + 1)[:, np.newaxis, np.newaxis])
+        costs = buying @ _COST[_VICTORY_ORDER]
+
+        # There are only a few dozen numbers to go through, which plain Python does faster than many tiny arrays.
+        rounds = []
+        for coins_left, hand_incomes, hand_costs in zip(coins.tolist(), incomes.T.tolist(), costs.T.tolist()):
+            total = 0
+            for income, cost in zip(hand_incomes, hand_costs):
+                if cost == 0:
+                    break
+                shortfall = max(cost - coins_left, 0)
+                if income == 0 and shortfall > 0:
+                    total = MAX_ROUNDS
+                    break
+                # Only one card can be bought a turn, so every card after this turn's waits at least a round.
+                waiting = max(-(-shortfall // max(income, 1)), 1)
+                total += waiting
+                coins_left += waiting * income - cost
+            rounds.append(total)
+        return np.minimum(rounds, MAX_ROUNDS)
+
+    def advise(self, counts: np.ndarray, coins: int) -> Advice:
+        """
+        Advise a player holding `counts` of each card, indexed by card id, with `coins` coins.
+        """
+        affordable = np.flatnonzero((counts < SUPPLY_LIMITS) & (_COST <= coins * 36))
+        # The first option is to save, and every other option buys one card.
+        options = np.tile(counts, (len(affordable) + 1, 1))
+        options[np.arange(1, len(affordable) + 1), affordable] += 1
+        remaining = np.concatenate([[coins * 36], coins * 36 - _COST[affordable]])
+        rounds = self._rounds_to_win(options, remaining)
+
+        roll_two, income = self._incomes(counts[np.newaxis, :])
+        choices = [None] + [cards.distinct_cards[i] for i in affordable]
+        # Sort by rounds to win, preferring to buy something over saving when it makes no difference.
+        order = sorted(range(len(choices)), key=lambda i: (rounds[i], i == 0))
+        return Advice(
+            roll_two=bool(roll_two[0]),
+            buy=choices[order[0]],
+            expected_coins_per_round=float(income[0]) / 36,
+            options=[(choices[i], int(rounds[i])) for i in order])
+
+ADVISORS = {num_players: Advisor(num_players) for num_players in range(2, 5)}
+
+def parse_hand(hand: Any) -> np.ndarray:
+    """
+    The count of each card, indexed by card id, from a JSON hand:
+    either a list of card names or an object from card names to counts.
+    """
+    if isinstance(hand, list):
+        hand = {name: hand.count(name) for name in set(hand)}
+    if not isinstance(hand, dict):
+        raise AdviceError("The hand must be a list of card names or an object of card counts.")
+    counts = np.zeros(cards.NUM_DISTINCT_CARDS, dtype=np.int64)
+    for name, count in hand.items():
+        i = cards.CARD_IDS_BY_NAME.get(name)
+        if i is None:
+            raise AdviceError(f"Unknown card: {name}")
+        # JSON's true and false come through as Python bools, which are also ints.
+        if not isinstance(count, int) or isinstance(count, bool) or not (0 <= count <= SUPPLY_LIMITS[i]):
+            raise AdviceError(f"You can't hold {count} of {name}.")
+        counts[i] = count
+    return counts
+
+@functools.lru_cache(maxsize=1 << 14)
+def _cached_advice(counts: bytes, coins: int, num_players: int) -> bytes:
+    advice = ADVISORS[num_players].advise(np.frombuffer(counts, dtype=np.int64), coins)
+    return json.dumps(advice.to_json()).encode()
+
+def advise(query: Dict[str, Any]) -> bytes:
+    """Answer a JSON query with the JSON advice, ready to send."""
+    if not isinstance(query, dict):
+        raise AdviceError("The query must be a JSON object.")
+    num_players = query.get("players")
+    if num_players not in ADVISORS:
+        raise AdviceError("players must be 2, 3 or 4.")
+    coins = query.get("coins")
+    if not isinstance(coins, int) or isinstance(coins, bool) or coins < 0:
+        raise AdviceError("coins must be a whole number of at least 0.")
+    return _cached_advice(parse_hand(query.get("hand", {})).tobytes(), coins, num_players)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: " + ("keep-alive" if keep_alive else "close")
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+def _route(method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+    if path == "/health":
+        return 200, b'{"status": "ok"}'
+    if path != "/advice":
+        return 404, _error(f"Unknown path: {path}")
+    if method != "POST":
+        return 405, _error("Send queries to /advice with POST.")
+    try:
+        return 200, advise(json.loads(body))
+    except json.JSONDecodeError as e:
+        return 400, _error(f"Invalid JSON: {e}")
+    except UnicodeDecodeError:
+        return 400, _error("The query must be JSON encoded as UTF-8.")
+    except AdviceError as e:
+        return 400, _error(str(e))
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer requests on one connection until the client closes it."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")[:-2]
+            method, path, version = request_line.split()
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            status, payload = _route(method, path, body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def start_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+    # Fill the caches that aren't built on import before the first query comes in.
+    for num_players in ADVISORS:
+        advise({"hand": ["Wheat Field", "Bakery"], "coins": 3, "players": num_players})
+    return await asyncio.start_server(_handle_connection, host, port)
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Run the service until interrupted."""
+    async def run():
+        server = await start_server(host, port)
+        print(f"Serving advice on http://{host}:{port}/advice", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
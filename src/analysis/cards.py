@@ -1,62 +1,112 @@
+import functools
 import math
 
-import pandas as pd
+import numpy as np
 
+from .dice import FAIR, MAX_ROLL, DiceModel
+from dataclasses import dataclass
 from machi_koro import cards
-from machi_koro.cards import Card, Color
-from typing import Iterable, List
-
-def _ways_12(x):
-    if x ==  2: return 1
-    if x ==  3: return 2
-    if x ==  4: return 3
-    if x ==  5: return 4
-    if x ==  6: return 5
-    if x ==  7: return 6
-    if x ==  8: return 5
-    if x ==  9: return 4
-    if x == 10: return 3
-    if x == 11: return 2
-    if x == 12: return 1
-    return 0
+from machi_koro.cards import Card, Color, Hand
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 COLORS_ACTIVATED_ON_MY_TURN = [Color.BLUE, Color.GREEN, Color.PURPLE]
 COLORS_ACTIVATED_ON_OTHER_TURN = [Color.RED, Color.BLUE]
 
-def _roll_probability(numbers: Iterable[int], two_dice: bool) -> float:
-    if two_dice:
-        return sum(_ways_12(x) for x in numbers) / 36
+@functools.lru_cache(maxsize=None)
+def roll_distribution(two_dice: bool, dice: DiceModel = FAIR) -> np.ndarray:
+    """The probability of each roll from 0 through 12."""
+    return dice.roll_distribution(two_dice)
+
+@dataclass(frozen=True)
+class RevenueKernel:
+    """
+    The revenue of every card, precomputed for a number of players as arrays indexed by card id.
+
+    Each card's revenue is modeled as
+    `base + linear @ counts + presence @ (counts > 0)`,
+    where `linear` picks up cards that pay per card held (like the factories)
+    and `presence` picks up cards that only need to be held once (like the Shopping Mall).
+    """
+    base: np.ndarray
+    linear: np.ndarray
+    presence: np.ndarray
+
+    def revenue(self, counts: np.ndarray) -> np.ndarray:
+        """The revenue of each card when it is activated for a hand given by `counts`."""
+        return self.base + self.linear @ counts + self.presence @ (counts > 0)
+
+@functools.lru_cache(maxsize=None)
+def revenue_kernel(num_players: int) -> RevenueKernel:
+    """Build a `RevenueKernel` by probing `Card.revenue` with small hands."""
+    n = cards.NUM_DISTINCT_CARDS
+    base = np.zeros(n, dtype=np.int64)
+    linear = np.zeros((n, n), dtype=np.int64)
+    presence = np.zeros((n, n), dtype=np.int64)
+    for i, card in enumerate(cards.distinct_cards):
+        base[i] = card.revenue([], num_players)
+        for j, other in enumerate(cards.distinct_cards):
+            one = card.revenue([other], num_players) - base[i]
+            two = card.revenue([other, other], num_players) - base[i]
+            linear[i, j] = two - one
+            presence[i, j] = 2 * one - two
+    return RevenueKernel(base, linear, presence)
+
+@functools.lru_cache(maxsize=None)
+def activation_table() -> np.ndarray:
+    """Whether each card activates on each roll, indexed by [roll, card id] for rolls 0 through 12."""
+    return np.array([[bool(card.activation_mask >> roll & 1) for card in cards.distinct_cards] for roll in range(MAX_ROLL + 1)])
+
+@functools.lru_cache(maxsize=None)
+def activation_probabilities(two_dice: bool, dice: DiceModel = FAIR) -> np.ndarray:
+    """The probability of activating each card on a roll, indexed by card id."""
+    ways = dice.ways(two_dice)
+    # Add up the ways before dividing so whole-number weights give the same result as counting by hand.
+    return (ways @ activation_table()) / ways.sum()
+
+@functools.lru_cache(maxsize=None)
+def color_mask(colors: tuple) -> np.ndarray:
+    """Whether each card has one of `colors`, indexed by card id."""
+    return np.array([card.color in colors for card in cards.distinct_cards])
+
+def _revenue(card: Card, hand: Union[List[Card], Hand], num_players: int) -> int:
+    if isinstance(hand, Hand):
+        kernel = revenue_kernel(num_players)
+        i = cards.card_id(card)
+        return int(kernel.base[i] + kernel.linear[i] @ hand.counts + kernel.presence[i] @ (hand.counts > 0))
     else:
-        return sum([1 for n in numbers if 1 <= n <= 6]) / 6
+        return card.revenue(hand, num_players)
 
-def expected_value(card: Card, hand: List[Card], two_dice: bool, num_players: int) -> float:
+def expected_value(card: Card, hand: List[Card], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a card will yield on a turn when it can be activated."""
-    probability = _roll_probability(card.activates_on, two_dice)
-    return probability * card.revenue(hand, num_players)
+    probability = float(activation_probabilities(two_dice, dice)[cards.card_id(card)])
+    return probability * _revenue(card, hand, num_players)
 
-def expected_value_my_turn(card: Card, hand: List[Card], two_dice: bool, num_players: int) -> float:
+def expected_value_my_turn(card: Card, hand: List[Card], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a card will yield on your turn."""
     if card.color in COLORS_ACTIVATED_ON_MY_TURN:
-        return expected_value(card, hand, two_dice, num_players)
+        return expected_value(card, hand, two_dice, num_players, dice)
     else:
         return 0
 
-def expected_value_other_turn(card: Card, hand: List[Card], two_dice: bool, num_players: int) -> float:
+def expected_value_other_turn(card: Card, hand: List[Card], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a card will yield on another player's turn."""
     if card.color in COLORS_ACTIVATED_ON_OTHER_TURN:
-        return expected_value(card, hand, two_dice, num_players)
+        return expected_value(card, hand, two_dice, num_players, dice)
     else:
         return 0
 
-def gross_expected_value(card: Card, hand: List[Card], two_dice: bool, num_players: int) -> float:
+def gross_expected_value(card: Card, hand: List[Card], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a card will yield, taking into account whether it is active or not."""
-    my_turn = expected_value_my_turn(card, hand, two_dice, num_players)
-    other_turn = expected_value_other_turn(card, hand, two_dice, num_players)
+    my_turn = expected_value_my_turn(card, hand, two_dice, num_players, dice)
+    other_turn = expected_value_other_turn(card, hand, two_dice, num_players, dice)
     return (my_turn + (num_players - 1) * other_turn) / num_players
 
 def fastest_payoff(card: Card, hand: List[Card], num_players: int):
     """The number of rolls needed to pay off a card if the card is activated by every roll."""
-    revenue = card.revenue(hand, num_players)
+    revenue = _revenue(card, hand, num_players)
     if revenue == 0:
         return None
     elif card.color in COLORS_ACTIVATED_ON_OTHER_TURN:
@@ -66,31 +116,120 @@ def fastest_payoff(card: Card, hand: List[Card], num_players: int):
         # You have to wait until your turn for it to pay off.
         return num_players * math.ceil(card.cost / revenue)
 
-def expected_payoff(card: Card, hand: List[Card], two_dice: bool, num_players: int):
+def expected_payoff(card: Card, hand: List[Card], two_dice: bool, num_players: int, dice: DiceModel = FAIR):
     """The number of rolls to pay off a card on average."""
-    revenue = gross_expected_value(card, hand, two_dice, num_players)
+    revenue = gross_expected_value(card, hand, two_dice, num_players, dice)
     if revenue == 0:
         return None
     else:
         # The my turn / other turn logic is already built in to `gross_expected_value()`.
         return math.ceil(card.cost / revenue)
 
-def run(two_dice: bool) -> pd.DataFrame:
-    """
-    Run the full analysis on all cards.
-    """
+def reference_hand() -> Hand:
+    """The hand `run` analyzes the cards with."""
     # The factory cards depend on the other cards in your hand.
     # Analyze using one of each kind of card they depend on.
-    hand = [
+    return Hand([
         cards.WheatField(),
         cards.Ranch(),
         cards.Forest()
-    ]
+    ])
+
+def run(two_dice: bool, dice: DiceModel = FAIR) -> "pd.DataFrame":
+    """
+    Run the full analysis on all cards.
+
+    dice -- The dice to analyze with, such as `dice.empirical(...)` for the dice we recorded.
+    """
+    import pandas as pd
+
+    hand = reference_hand()
+    scenarios = sweep(hand.counts, num_players=(2, 3, 4), two_dice=(two_dice,), dice=dice)
     return pd.DataFrame({
         "Card": [card.name for card in cards.distinct_cards],
-        "Expected coins per roll (2p)": [gross_expected_value(card, hand, two_dice, num_players=2) for card in cards.distinct_cards],
-        "Expected coins per roll (3p)": [gross_expected_value(card, hand, two_dice, num_players=3) for card in cards.distinct_cards],
-        "Expected coins per roll (4p)": [gross_expected_value(card, hand, two_dice, num_players=4) for card in cards.distinct_cards],
+        "Expected coins per roll (2p)": scenarios.expected_value[0, 0, 0],
+        "Expected coins per roll (3p)": scenarios.expected_value[0, 1, 0],
+        "Expected coins per roll (4p)": scenarios.expected_value[0, 2, 0],
         "Minimum rolls for payoff (4p)": [fastest_payoff(card, hand, num_players=4) for card in cards.distinct_cards],
-        "Expected rolls for payoff (4p)": [expected_payoff(card, hand, two_dice, num_players=4) for card in cards.distinct_cards]
-    })
\ No newline at end of file
+        "Expected rolls for payoff (4p)": scenarios.expected_payoff()[0, 2, 0]
+    })
+
+def hand_grid(ranges: Dict[Card, Iterable[int]], base: Optional[Hand] = None) -> np.ndarray:
+    """
+    Every combination of the given numbers of each card, as hands indexed by [hand, card id].
+
+    ranges -- The numbers of copies of each card to try, such as `{cards.Ranch(): range(7)}`.
+    base -- The cards every hand starts with. Cards in `ranges` replace what `base` has of them.
+    """
+    start = np.zeros(cards.NUM_DISTINCT_CARDS, dtype=np.int64) if base is None else base.counts
+    ids = [cards.card_id(card) for card in ranges]
+    values = [np.asarray(list(numbers), dtype=np.int64) for numbers in ranges.values()]
+    counts = np.tile(start, (int(np.prod([len(v) for v in values])), 1))
+    for i, grid in zip(ids, np.meshgrid(*values, indexing="ij")):
+        counts[:, i] = grid.ravel()
+    return counts
+
+@dataclass
+class Sweep:
+    """
+    The gross expected value of every card over a grid of scenarios, like `run` computes for one hand.
+
+    counts -- The hand for each scenario, indexed by [hand, card id].
+    num_players -- The player count for each index along the second axis of `expected_value`.
+    two_dice -- Whether two dice are rolled for each index along the third axis of `expected_value`.
+    expected_value -- The gross expected value of each card, indexed by [hand, player count, dice, card id].
+    """
+    counts: np.ndarray
+    num_players: Tuple[int, ...]
+    two_dice: Tuple[bool, ...]
+    expected_value: np.ndarray
+
+    def expected_payoff(self) -> np.ndarray:
+        """The same as `expected_payoff` for every scenario, with NaN for cards that never pay off."""
+        cost = np.array([card.cost for card in cards.distinct_cards])
+        with np.errstate(divide="ignore"):
+            payoff = np.ceil(cost / self.expected_value)
+        return np.where(self.expected_value == 0, np.nan, payoff)
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """A long-form table with a row for every card in every scenario, and a column for each card whose count varies."""
+        import pandas as pd
+
+        hand, players, dice, card = np.indices(self.expected_value.shape).reshape(4, -1)
+        columns = {}
+        for i in np.flatnonzero((self.counts != self.counts[:1]).any(axis=0)):
+            columns[f"# {cards.distinct_cards[i].name}"] = self.counts[hand, i]
+        columns.update({
+            "# Players": np.array(self.num_players)[players],
+            "Two Dice": np.array(self.two_dice)[dice],
+            "Card": np.array([c.name for c in cards.distinct_cards])[card],
+            "Expected coins per roll": self.expected_value.ravel(),
+            "Expected rolls for payoff": self.expected_payoff().ravel()
+        })
+        return pd.DataFrame(columns)
+
+def sweep(
+    counts: np.ndarray,
+    num_players: Sequence[int] = (2, 3, 4),
+    two_dice: Sequence[bool] = (False, True),
+    dice: DiceModel = FAIR
+) -> Sweep:
+    """
+    Run the analysis of `run` on every card for every combination of hand, player count and number of dice at once.
+
+    counts -- The hands to analyze, indexed by [hand, card id], such as from `hand_grid`.
+    """
+    counts = np.atleast_2d(counts)
+    my_turn = color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN))
+    other_turn = color_mask(tuple(COLORS_ACTIVATED_ON_OTHER_TURN))
+    expected_value = np.empty((len(counts), len(num_players), len(two_dice), cards.NUM_DISTINCT_CARDS))
+    for i, n in enumerate(num_players):
+        if not (2 <= n <= 4):
+            raise ValueError()
+        kernel = revenue_kernel(n)
+        revenue = kernel.base + counts @ kernel.linear.T + (counts > 0) @ kernel.presence.T
+        for j, two in enumerate(two_dice):
+            # The same arithmetic as `gross_expected_value`, for every card and hand at once.
+            value = activation_probabilities(two, dice) * revenue
+            expected_value[:, i, j] = (value * my_turn + (n - 1) * (value * other_turn)) / n
+    return Sweep(counts, tuple(num_players), tuple(two_dice), expected_value)
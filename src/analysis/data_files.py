@@ -1,15 +1,98 @@
 import os
+import shutil
 
-import pandas as pd
+import numpy as np
+
+from typing import TYPE_CHECKING, Iterator, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 scriptdir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(scriptdir, '..', '..')
 data_dir = os.path.join(project_root, 'data')
 
+# Rows per chunk when streaming a file, which bounds the memory used no matter how big the file is.
+CHUNK_SIZE = 1 << 20
+
 def read_tsv(filename):
     """
     Load data in TSV format from the data directory.
 
     filename -- Relative path to the file from the root of the data directory.
     """
-    return pd.read_csv(os.path.join(data_dir, filename), sep='\t')
\ No newline at end of file
+    import pandas as pd
+
+    return pd.read_csv(os.path.join(data_dir, filename), sep='\t')
+
+def iter_tsv(filename: str, chunksize: int = CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+    """
+    Load data in TSV format from the data directory a chunk of rows at a time.
+
+    filename -- Relative path to the file from the root of the data directory.
+    """
+    import pandas as pd
+
+    with pd.read_csv(os.path.join(data_dir, filename), sep='\t', chunksize=chunksize) as reader:
+        yield from reader
+
+def read_npy(filename: str) -> np.ndarray:
+    """
+    Memory-map an array saved in NumPy's `.npy` format from the data directory.
+    Nothing is read from disk until it is used.
+
+    filename -- Relative path to the file from the root of the data directory.
+    """
+    return np.load(os.path.join(data_dir, filename), mmap_mode='r')
+
+def iter_npy(filename: str, chunksize: int = CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Load an array saved in NumPy's `.npy` format from the data directory a chunk of rows at a time.
+
+    filename -- Relative path to the file from the root of the data directory.
+    """
+    array = read_npy(filename)
+    for start in range(0, len(array), chunksize):
+        yield array[start:start + chunksize]
+
+def iter_chunks(filename: str, chunksize: int = CHUNK_SIZE) -> Iterator[Union["pd.DataFrame", np.ndarray]]:
+    """Stream a file from the data directory in whichever format its extension says it is in."""
+    if filename.endswith('.npy'):
+        return iter_npy(filename, chunksize)
+    return iter_tsv(filename, chunksize)
+
+def tsv_to_npy(filename: str, npy_filename: str, dtype=np.int8, chunksize: int = CHUNK_SIZE) -> None:
+    """
+    Convert a TSV file in the data directory to a `.npy` file with one field per column,
+    so later analyses can memory-map it instead of parsing it again.
+    The file is converted a chunk at a time.
+
+    dtype -- The type to store every column as.
+    """
+    path = os.path.join(data_dir, npy_filename)
+    body_path = path + '.tmp'
+    num_rows = 0
+    record = None
+    with open(body_path, 'wb') as body:
+        for chunk in iter_tsv(filename, chunksize):
+            if record is None:
+                record = np.dtype([(str(column), dtype) for column in chunk.columns])
+            rows = np.empty(len(chunk), dtype=record)
+            for column in chunk.columns:
+                rows[str(column)] = chunk[column]
+            body.write(rows.tobytes())
+            num_rows += len(rows)
+
+    if record is None:
+        columns = read_tsv(filename).columns
+        record = np.dtype([(str(column), dtype) for column in columns])
+
+    # The header holds the number of rows, so it can only be written once they have all been counted.
+    with open(path, 'wb') as f, open(body_path, 'rb') as body:
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': np.lib.format.dtype_to_descr(record),
+            'fortran_order': False,
+            'shape': (num_rows,)
+        })
+        shutil.copyfileobj(body, f)
+    os.remove(body_path)
@@ -0,0 +1,77 @@
+"""
+Models of the dice, for running the analysis with dice that aren't fair.
+
+A model gives each face of each die a relative weight.
+Weights that are whole numbers, such as counts of recorded rolls, keep the probabilities exact.
+"""
+import functools
+
+import numpy as np
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .rolls import RollStatistics
+
+FACES = 6
+
+# The highest roll, from two dice.
+MAX_ROLL = 2 * FACES
+
+@dataclass(frozen=True)
+class DiceModel:
+    """
+    The relative weight of each face of the dice, from 1 through 6.
+
+    first -- The die that gets rolled when rolling one die.
+    second -- The other die that gets rolled when rolling two.
+    """
+    first: Tuple[float, ...]
+    second: Tuple[float, ...]
+
+    def __post_init__(self):
+        for weights in (self.first, self.second):
+            if len(weights) != FACES or min(weights) < 0 or sum(weights) <= 0:
+                raise ValueError(f"A die needs {FACES} non-negative weights that aren't all zero: {weights}")
+
+    def ways(self, two_dice: bool) -> np.ndarray:
+        """The relative weight of each roll from 0 through 12."""
+        return _ways(self, two_dice)
+
+    def roll_distribution(self, two_dice: bool) -> np.ndarray:
+        """The probability of each roll from 0 through 12."""
+        ways = self.ways(two_dice)
+        return ways / ways.sum()
+
+@functools.lru_cache(maxsize=None)
+def _ways(dice: DiceModel, two_dice: bool) -> np.ndarray:
+    first = np.array((0,) + dice.first)
+    ways = np.convolve(first, np.array((0,) + dice.second)) if two_dice else first
+    ways = np.pad(ways, (0, MAX_ROLL + 1 - len(ways)))
+    ways.flags.writeable = False
+    return ways
+
+def weighted(first: Sequence[float], second: Sequence[float] = None) -> DiceModel:
+    """
+    A model of dice with the given weight on each face.
+
+    second -- The weights of the second die, if it is different from the first.
+    """
+    first = tuple(first)
+    return DiceModel(first, first if second is None else tuple(second))
+
+FAIR = weighted([1] * FACES)
+
+def empirical(statistics: "RollStatistics") -> DiceModel:
+    """
+    A model of the dice recorded in a log, weighting each face by how many times it came up.
+    Get the statistics for a log with `rolls.summarize`.
+
+    The first die in the log is the one rolled when rolling one die.
+    A log of one die models both dice with the same die.
+    """
+    face_counts = statistics.face_counts[:, 1:]
+    return weighted(
+        [int(n) for n in face_counts[0]],
+        [int(n) for n in face_counts[1]] if len(face_counts) > 1 else None)
@@ -0,0 +1,151 @@
+"""
+Look up whether rolling two dice is expected to earn more than rolling one, for any hand.
+
+Only the cards that pay on your own turn, and the cards their revenue depends on, affect the choice.
+Every combination of those cards up to `max_copies` of each is numbered in mixed radix,
+and whether two dice earn strictly more is worked out for all of them at once with NumPy.
+The answers are saved as a `.npy` file of one byte per hand, which is memory-mapped when it is loaded,
+so a `DicePolicy` is ready instantly and each turn is a single index into the table.
+Hands with more copies of a card than the table covers are worked out directly.
+
+Without a Train Station, a player can only roll one die.
+"""
+import os
+
+import numpy as np
+
+from .cards import COLORS_ACTIVATED_ON_MY_TURN, activation_table, color_mask, revenue_kernel
+from .data_files import project_root
+from .dice import FAIR, DiceModel
+from .result_cache import cache_key, card_fingerprint
+from .strategies import PlayerState
+from machi_koro import cards
+from machi_koro.cards import supply_limits
+from typing import Optional
+
+DEFAULT_DIRECTORY = os.path.join(project_root, '.cache', 'dice_policy')
+
+# Three of each establishment covers nearly every hand in the named strategies, in 8 MiB.
+DEFAULT_MAX_COPIES = 3
+
+_TRAIN_STATION = cards.card_id(cards.TrainStation())
+
+def _relevant_cards(num_players: int) -> np.ndarray:
+    """The ids of the cards whose count can change how much a hand earns on its own turn."""
+    kernel = revenue_kernel(num_players)
+    pays = color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN)) & (
+        (kernel.base != 0) | kernel.linear.any(axis=1) | kernel.presence.any(axis=1))
+    depended_on = (kernel.linear[pays] != 0).any(axis=0) | (kernel.presence[pays] != 0).any(axis=0)
+    return np.flatnonzero(pays | depended_on)
+
+def table_key(num_players: int, max_copies: int = DEFAULT_MAX_COPIES, dice: DiceModel = FAIR) -> str:
+    """A hash of everything a policy table depends on, which names its file."""
+    return cache_key(
+        "dice_policy",
+        dice,
+        num_players=num_players,
+        max_copies=max_copies,
+        cards={card.name: card_fingerprint(card) for card in cards.distinct_cards})
+
+class DicePolicy:
+    """
+    A `Strategy.RollTwo` that rolls two dice whenever they are expected to earn strictly more than one on your turn.
+
+    table -- Whether to roll two dice for each hand, indexed by the mixed-radix number of its relevant cards.
+    fallbacks -- How many lookups were for hands past `max_copies` and had to be worked out directly.
+    """
+    CHUNK_SIZE = 1 << 18
+    # See `strategies.hand_only`.
+    hand_only = True
+
+    def __init__(self, table: np.ndarray, num_players: int, max_copies: int = DEFAULT_MAX_COPIES, dice: DiceModel = FAIR):
+        if not (2 <= num_players <= 4):
+            raise ValueError()
+        self.num_players = num_players
+        self.max_copies = max_copies
+        self.dice = dice
+        self.relevant = _relevant_cards(num_players)
+        self.caps = supply_limits(max_copies)[self.relevant]
+        radix = self.caps + 1
+        self.strides = np.concatenate([[1], np.cumprod(radix[:-1])]).astype(np.int64)
+        if len(table) != int(np.prod(radix)):
+            raise ValueError(f"A table for {max_copies} copies of each card needs {int(np.prod(radix))} entries, not {len(table)}.")
+        self.table = table
+        self.fallbacks = 0
+
+        # The relative chance that each card activates on your turn with one and with two dice.
+        my_turn = color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN))
+        one_die, two_dice = dice.ways(False), dice.ways(True)
+        # Scale each by the other's total so they can be compared without dividing.
+        self._one_die = (one_die @ activation_table()) * my_turn * two_dice.sum()
+        self._two_dice = (two_dice @ activation_table()) * my_turn * one_die.sum()
+        # Every revenue is a small whole number, so floating point is exact and lets NumPy use BLAS.
+        kernel = revenue_kernel(num_players)
+        self._base = kernel.base.astype(np.float64)
+        self._linear = np.ascontiguousarray(kernel.linear.T, dtype=np.float64)
+        self._presence = np.ascontiguousarray(kernel.presence.T, dtype=np.float64)
+
+    def prefers_two_dice(self, counts: np.ndarray) -> np.ndarray:
+        """Whether two dice earn strictly more for each row of card counts, indexed by card id."""
+        counts = counts.astype(np.float64)
+        revenue = counts * (self._base + counts @ self._linear + (counts > 0).astype(np.float64) @ self._presence)
+        return revenue @ self._two_dice > revenue @ self._one_die
+
+    @staticmethod
+    def build(num_players: int, max_copies: int = DEFAULT_MAX_COPIES, dice: DiceModel = FAIR) -> "DicePolicy":
+        """Work out the choice for every hand up to `max_copies` of each card."""
+        relevant = _relevant_cards(num_players)
+        radix = supply_limits(max_copies)[relevant] + 1
+        table = np.empty(int(np.prod(radix)), dtype=np.uint8)
+        policy = DicePolicy(table, num_players, max_copies, dice)
+        # Work through the hands a piece at a time to limit memory use.
+        for start in range(0, len(table), DicePolicy.CHUNK_SIZE):
+            index = np.arange(start, min(start + DicePolicy.CHUNK_SIZE, len(table)), dtype=np.int64)
+            counts = np.zeros((len(index), cards.NUM_DISTINCT_CARDS))
+            # The first relevant card varies fastest, so it is the last digit to `np.unravel_index`.
+            counts[:, relevant[::-1]] = np.stack(np.unravel_index(index, tuple(radix[::-1])), axis=1)
+            table[start:start + len(index)] = policy.prefers_two_dice(counts)
+        return policy
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to a temporary file first so a reader never sees half a table.
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.asarray(self.table), allow_pickle=False)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path: str, num_players: int, max_copies: int = DEFAULT_MAX_COPIES, dice: DiceModel = FAIR) -> "DicePolicy":
+        """Memory-map a table saved by `save`. Nothing is read from disk until it is looked up."""
+        return DicePolicy(np.load(path, mmap_mode='r'), num_players, max_copies, dice)
+
+    def roll_two(self, counts: np.ndarray) -> bool:
+        """Whether to roll two dice with a hand given by its count of each card."""
+        if counts[_TRAIN_STATION] == 0:
+            return False
+        relevant = counts[self.relevant]
+        if (relevant > self.caps).any():
+            self.fallbacks += 1
+            return bool(self.prefers_two_dice(counts[None, :])[0])
+        return bool(self.table[relevant @ self.strides])
+
+    def __call__(self, player_state: PlayerState) -> bool:
+        return self.roll_two(player_state.hand.counts)
+
+def dice_policy(
+    num_players: int,
+    max_copies: int = DEFAULT_MAX_COPIES,
+    dice: DiceModel = FAIR,
+    directory: Optional[str] = DEFAULT_DIRECTORY
+) -> DicePolicy:
+    """
+    Load the policy table for a game from `directory`, or build it and save it there first.
+
+    directory -- Where tables are saved, or None to build the table in memory every time.
+    """
+    if directory is None:
+        return DicePolicy.build(num_players, max_copies, dice)
+    path = os.path.join(directory, table_key(num_players, max_copies, dice) + '.npy')
+    if not os.path.exists(path):
+        DicePolicy.build(num_players, max_copies, dice).save(path)
+    return DicePolicy.load(path, num_players, max_copies, dice)
@@ -0,0 +1,240 @@
+"""
+Search for good build orders with a genetic algorithm.
+
+A genome is a `StrategySpec`: a build order and a dice policy.
+Each generation keeps the best few genomes as they are and breeds the rest of the population from
+winners of small tournaments, crossing two parents' build orders at a random point and then mutating the child.
+Every child is repaired to buy each victory card exactly once and no more than the supply of anything else.
+
+Fitness is the number of rounds it takes to win, so lower is better:
+either the rounds of the expected value model from `strategies.simulate`,
+or the average over Monte Carlo games from `monte_carlo.simulate`.
+Every genome is only ever evaluated once, and new genomes are evaluated in parallel across processes.
+The population can be saved to a checkpoint after each generation so a long run can pick up where it left off.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from .strategies import (
+    MAX_ROUNDS,
+    NAMED_STRATEGIES,
+    ROLL_TWO_POLICIES,
+    VICTORY_CARDS,
+    InvalidStrategyError,
+    Strategy,
+    StrategySpec,
+    simulate
+)
+from dataclasses import dataclass
+from machi_koro import cards
+from machi_koro.cards import SUPPLY_LIMITS
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_VICTORY_IDS = [cards.card_id(c) for c in VICTORY_CARDS]
+
+# Long enough for any sensible build order; longer genomes are cut short.
+MAX_LENGTH = 40
+
+# What a genome that never wins scores.
+_NEVER_WINS = float(MAX_ROUNDS + 1)
+
+@dataclass
+class EvolutionResult:
+    """
+    The best genomes found and how much work it took to find them.
+
+    best -- The genomes of the final population with their fitness, best first.
+    evaluations -- How many genomes were evaluated.
+    cache_hits -- How many children were already evaluated and didn't need to be again.
+    """
+    best: List[Tuple[StrategySpec, float]]
+    generations: int
+    evaluations: int
+    cache_hits: int
+    seconds: float
+
+    def best_strategy(self) -> Strategy:
+        """A fresh `Strategy` for the best genome, ready for `strategies.simulate`."""
+        return self.best[0][0].to_strategy()
+
+def fitness(spec: StrategySpec, num_players: int, num_games: int = 0, seed: Optional[int] = None) -> float:
+    """
+    The rounds it takes a genome to win.
+
+    num_games -- How many Monte Carlo games to average over with `seed`,
+        or 0 for the expected value model of `strategies.simulate`.
+        Games that never finish count as taking `monte_carlo.MAX_ROUNDS` rounds.
+    """
+    if num_games == 0:
+        try:
+            return float(simulate(spec.to_strategy(), num_players, log="summary", engine="events").rounds_to_win)
+        except InvalidStrategyError:
+            return _NEVER_WINS
+
+    # Imported here because `monte_carlo` is only needed for Monte Carlo fitness.
+    from . import monte_carlo
+    rounds_to_win = monte_carlo.simulate(spec.to_strategy(), num_players, num_games, seed)
+    total = np.arange(len(rounds_to_win.counts)) @ rounds_to_win.counts + rounds_to_win.unfinished * monte_carlo.MAX_ROUNDS
+    return float(total / rounds_to_win.num_games)
+
+def _fitness_job(job: Tuple[StrategySpec, int, int, Optional[int]]) -> float:
+    return fitness(*job)
+
+def repair(build_order: Sequence[int], rng: np.random.Generator) -> Tuple[int, ...]:
+    """
+    Make a build order valid: drop copies beyond the supply of each card
+    and put any missing victory card at a random place.
+    """
+    counts = [0] * cards.NUM_DISTINCT_CARDS
+    kept = []
+    for i in build_order:
+        if counts[i] < SUPPLY_LIMITS[i]:
+            kept.append(i)
+            counts[i] += 1
+    for i in _VICTORY_IDS:
+        if counts[i] == 0:
+            kept.insert(int(rng.integers(len(kept) + 1)), i)
+    # Drop establishments from the end so every victory card stays.
+    while len(kept) > MAX_LENGTH:
+        extra = next(j for j in range(len(kept) - 1, -1, -1) if kept[j] not in _VICTORY_IDS)
+        del kept[extra]
+    return tuple(kept)
+
+def random_genome(rng: np.random.Generator, max_establishments: int = 16) -> StrategySpec:
+    build_order = list(rng.integers(cards.NUM_DISTINCT_CARDS, size=int(rng.integers(max_establishments + 1))))
+    return StrategySpec(repair([int(i) for i in build_order], rng), str(rng.choice(list(ROLL_TWO_POLICIES))))
+
+def crossover(first: StrategySpec, second: StrategySpec, rng: np.random.Generator) -> StrategySpec:
+    """The start of one parent's build order followed by the rest of the other's, with either parent's dice policy."""
+    cut_first = int(rng.integers(len(first.build_order) + 1))
+    cut_second = int(rng.integers(len(second.build_order) + 1))
+    build_order = first.build_order[:cut_first] + second.build_order[cut_second:]
+    roll_two = first.roll_two if rng.random() < 0.5 else second.roll_two
+    return StrategySpec(repair(build_order, rng), roll_two)
+
+def mutate(spec: StrategySpec, rng: np.random.Generator, rate: float) -> StrategySpec:
+    """With probability `rate` each, insert a card, delete a card, swap two cards and switch the dice policy."""
+    build_order = list(spec.build_order)
+    roll_two = spec.roll_two
+    if rng.random() < rate:
+        build_order.insert(int(rng.integers(len(build_order) + 1)), int(rng.integers(cards.NUM_DISTINCT_CARDS)))
+    if rng.random() < rate and build_order:
+        del build_order[int(rng.integers(len(build_order)))]
+    if rng.random() < rate and len(build_order) > 1:
+        i, j = rng.choice(len(build_order), size=2, replace=False)
+        build_order[i], build_order[j] = build_order[j], build_order[i]
+    if rng.random() < rate:
+        roll_two = str(rng.choice([name for name in ROLL_TWO_POLICIES if name != roll_two] or [roll_two]))
+    return StrategySpec(repair(build_order, rng), roll_two)
+
+def _select(population: List[StrategySpec], scores: Dict[StrategySpec, float], rng: np.random.Generator, size: int = 3) -> StrategySpec:
+    """The fittest of a few genomes picked at random."""
+    contenders = rng.choice(len(population), size=min(size, len(population)), replace=False)
+    return min((population[i] for i in contenders), key=lambda spec: scores[spec])
+
+def _save_checkpoint(path: str, generation: int, population: List[StrategySpec], scores: Dict[StrategySpec, float],
+                     rng: np.random.Generator, games_seed: int, evaluations: int, cache_hits: int) -> None:
+    state = {
+        "generation": generation,
+        "population": [[list(s.build_order), s.roll_two] for s in population],
+        "scores": [[list(s.build_order), s.roll_two, score] for s, score in scores.items()],
+        "rng": rng.bit_generator.state,
+        "games_seed": games_seed,
+        "evaluations": evaluations,
+        "cache_hits": cache_hits
+    }
+    # Write to a temporary file first so an interrupted save never loses the last checkpoint.
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def _load_checkpoint(path: str, rng: np.random.Generator):
+    with open(path) as f:
+        state = json.load(f)
+    rng.bit_generator.state = state["rng"]
+    population = [StrategySpec(tuple(build_order), roll_two) for build_order, roll_two in state["population"]]
+    scores = {StrategySpec(tuple(build_order), roll_two): score for build_order, roll_two, score in state["scores"]}
+    return state["generation"], population, scores, state["games_seed"], state["evaluations"], state["cache_hits"]
+
+def evolve(
+    num_players: int,
+    generations: int = 50,
+    population_size: int = 64,
+    num_games: int = 0,
+    seed: Optional[int] = None,
+    elite: int = 4,
+    mutation_rate: float = 0.3,
+    max_workers: Optional[int] = None,
+    checkpoint: Optional[str] = None
+) -> EvolutionResult:
+    """
+    Evolve a population of build orders for `generations` generations.
+    The population starts from the named strategies and random genomes.
+
+    num_games -- How many Monte Carlo games to evaluate each genome with, or 0 for the expected value model.
+    elite -- How many of the best genomes are carried over to the next generation unchanged.
+    max_workers -- How many processes evaluate fitness. Defaults to the number of CPUs, and 1 evaluates in this process.
+    checkpoint -- A file to save the population to after every generation.
+        If it already exists, the run resumes from it with the random state and games it was saved with,
+        so `generations` counts the generations already run.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    # Every genome is scored with the same games so they can be compared fairly.
+    games_seed = int(np.random.SeedSequence(seed).generate_state(1)[0])
+    max_workers = max_workers or os.cpu_count()
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        generation, population, scores, games_seed, evaluations, cache_hits = _load_checkpoint(checkpoint, rng)
+    else:
+        generation, evaluations, cache_hits = 0, 0, 0
+        scores: Dict[StrategySpec, float] = {}
+        population = [StrategySpec.from_strategy(strategy()) for strategy in NAMED_STRATEGIES.values()]
+        population += [random_genome(rng) for _ in range(population_size - len(population))]
+        population = population[:population_size]
+
+    executor = None
+    if max_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            new = list(dict.fromkeys(spec for spec in population if spec not in scores))
+            jobs = [(spec, num_players, num_games, games_seed) for spec in new]
+            results = executor.map(_fitness_job, jobs, chunksize=max(1, len(jobs) // (4 * max_workers))) \
+                if executor is not None else map(_fitness_job, jobs)
+            scores.update(zip(new, results))
+            evaluations += len(new)
+            population.sort(key=lambda spec: scores[spec])
+
+            if checkpoint is not None:
+                _save_checkpoint(checkpoint, generation, population, scores, rng, games_seed, evaluations, cache_hits)
+            if generation >= generations:
+                break
+
+            children = population[:elite]
+            while len(children) < population_size:
+                child = crossover(_select(population, scores, rng), _select(population, scores, rng), rng)
+                child = mutate(child, rng, mutation_rate)
+                # Only a child bred in this generation can be a hit: the elite were just carried over.
+                if child in scores or child in children:
+                    cache_hits += 1
+                children.append(child)
+            population = children
+            generation += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return EvolutionResult(
+        best=[(spec, scores[spec]) for spec in dict.fromkeys(population)],
+        generations=generation,
+        evaluations=evaluations,
+        cache_hits=cache_hits,
+        seconds=time.perf_counter() - start)
@@ -0,0 +1,374 @@
+"""
+Search the game tree of a 2-player game to decide what to buy, taking the opponent into account.
+
+The single-player searches treat everyone else as passive,
+but with two players the opponent's red cards take your coins and their purchases race yours.
+Here a state is both hands as counts of each card, both players' coins, and whose turn it is.
+On each turn the player picks one or two dice, the roll is a chance node, and then the player picks what to buy,
+with coins moving between the players the same way as in `multiplayer`.
+The value of a state is the probability that the first player wins.
+
+The opponent either plays against you, minimizing that probability,
+or follows a fixed build order, which makes the search a best response to that strategy.
+The search stops a few turns ahead and estimates who is winning from each player's expected income
+under the model of `analysis.cards`.
+It deepens one turn at a time until its time budget runs out, remembering every value it works out
+in a transposition table so positions reached by different rolls are only searched once.
+"""
+import math
+import time
+
+from .cards import (
+    COLORS_ACTIVATED_ON_MY_TURN,
+    COLORS_ACTIVATED_ON_OTHER_TURN,
+    activation_probabilities,
+    color_mask,
+    revenue_kernel,
+    roll_distribution
+)
+from .dice import FAIR, DiceModel
+from .multiplayer import purple_income
+from .strategies import (
+    ROLL_TWO_POLICIES,
+    VICTORY_CARDS,
+    PlayerState,
+    Strategy,
+    StrategySpec,
+    income_by_roll,
+    simulate,
+    starting_hand
+)
+from dataclasses import dataclass
+from machi_koro import cards
+from machi_koro.cards import SUPPLY_LIMITS, Card, Color, Hand
+from typing import Dict, List, Optional, Tuple
+
+# A hand as the count of each card, indexed by card id.
+Counts = Tuple[int, ...]
+
+_NUM_PLAYERS = 2
+_STADIUM = cards.card_id(cards.Stadium())
+_TV_STATION = cards.card_id(cards.TvStation())
+_TRAIN_STATION = cards.card_id(cards.TrainStation())
+_VICTORY_IDS = [cards.card_id(c) for c in VICTORY_CARDS]
+_COST = [card.cost for card in cards.distinct_cards]
+_STARTING_CARDS = int(starting_hand().counts.sum())
+
+# How many rounds behind a player has to be to be about 73% sure to lose, for the heuristic.
+HEURISTIC_SCALE = 2.0
+
+@dataclass(frozen=True)
+class GameState:
+    """
+    A position in a 2-player game.
+
+    hands -- Each player's hand as counts indexed by card id.
+    coins -- Each player's coins.
+    to_move -- The player whose turn it is, 0 or 1.
+    """
+    hands: Tuple[Counts, Counts]
+    coins: Tuple[int, int]
+    to_move: int
+
+    @staticmethod
+    def start() -> "GameState":
+        hand = tuple(int(n) for n in starting_hand().counts)
+        coins = int(PlayerState(_NUM_PLAYERS).coins)
+        return GameState((hand, hand), (coins, coins), 0)
+
+@dataclass
+class SearchStats:
+    """
+    How much work a decision took.
+
+    depth -- How many turns ahead the last complete search looked.
+    lookups, hits -- How often the transposition table was checked and had the answer.
+    """
+    depth: int = 0
+    nodes: int = 0
+    lookups: int = 0
+    hits: int = 0
+    seconds: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+@dataclass
+class _HandTables:
+    """What a hand does on each roll from 0 through 12, as plain lists for fast lookups."""
+    my_income: List[int]
+    other_income: List[int]
+    red_demand: List[int]
+    take_from_each: List[int]
+    take_from_one: List[int]
+    # The expected income over a round and the victory cards still to buy, for the heuristic.
+    expected_per_round: float
+    missing_cost: int
+    missing_cards: int
+
+class _OutOfTime(Exception):
+    pass
+
+def _add(hand: Counts, i: int) -> Counts:
+    return hand[:i] + (hand[i] + 1,) + hand[i + 1:]
+
+class Solver:
+    """
+    An expectimax search over 2-player games with a transposition table shared by every decision.
+
+    opponent -- The build order the second player follows, or None for an opponent that plays to make you lose.
+    max_entries -- The most values to keep in the transposition table before the oldest are forgotten.
+    """
+    def __init__(self, opponent: Optional[StrategySpec] = None, max_entries: int = 1 << 20, dice: DiceModel = FAIR):
+        self.opponent = opponent
+        self.max_entries = max_entries
+        self.dice = dice
+        self.table: Dict[Tuple[GameState, int], float] = {}
+        self._hand_tables: Dict[Counts, _HandTables] = {}
+        # The opponent's choice of dice for each hand, since a dice policy only looks at the hand.
+        self._opponent_dice: Dict[Counts, bool] = {}
+        # The probability of each roll that can come up with one and with two dice.
+        self._rolls = {
+            two_dice: [(roll, float(p)) for roll, p in enumerate(roll_distribution(two_dice, dice)) if p > 0]
+            for two_dice in (False, True)
+        }
+        self._stats = SearchStats()
+        self._deadline = math.inf
+
+    def _tables(self, hand: Counts) -> _HandTables:
+        tables = self._hand_tables.get(hand)
+        if tables is None:
+            held = Hand.from_counts(hand)
+            kernel_revenue = revenue_kernel(_NUM_PLAYERS).revenue(held.counts) * held.counts
+            expected = {
+                two_dice: float(kernel_revenue @ (activation_probabilities(two_dice, self.dice) * color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN))))
+                for two_dice in (False, True)
+            }
+            other_turn = float(kernel_revenue @ (activation_probabilities(False, self.dice) * color_mask(tuple(COLORS_ACTIVATED_ON_OTHER_TURN))))
+            my_turn = max(expected[False], expected[True]) if hand[_TRAIN_STATION] else expected[False]
+            tables = _HandTables(
+                my_income=income_by_roll(held, _NUM_PLAYERS, [Color.BLUE, Color.GREEN]).tolist(),
+                other_income=income_by_roll(held, _NUM_PLAYERS, [Color.BLUE]).tolist(),
+                red_demand=income_by_roll(held, _NUM_PLAYERS, [Color.RED]).tolist(),
+                # The Stadium's revenue already counts every other player, and there is only one.
+                take_from_each=purple_income(held, _NUM_PLAYERS, _STADIUM).tolist(),
+                take_from_one=purple_income(held, _NUM_PLAYERS, _TV_STATION).tolist(),
+                expected_per_round=my_turn + (_NUM_PLAYERS - 1) * other_turn,
+                missing_cost=sum(_COST[i] for i in _VICTORY_IDS if hand[i] == 0),
+                missing_cards=sum(1 for i in _VICTORY_IDS if hand[i] == 0))
+            self._hand_tables[hand] = tables
+        return tables
+
+    def heuristic(self, state: GameState) -> float:
+        """
+        Estimate the probability that the first player wins
+        from how many rounds each player needs to afford their missing victory cards at their expected income.
+        """
+        rounds = []
+        for hand, coins in zip(state.hands, state.coins):
+            tables = self._tables(hand)
+            shortfall = max(tables.missing_cost - coins, 0)
+            income = tables.expected_per_round
+            rounds.append(max(shortfall / income if income > 0 else math.inf, tables.missing_cards))
+        if rounds[0] == rounds[1]:
+            advantage = 0.0
+        elif math.isinf(rounds[0]) or math.isinf(rounds[1]):
+            return 0.0 if math.isinf(rounds[0]) else 1.0
+        else:
+            advantage = rounds[1] - rounds[0]
+        # The player about to move is half a round ahead.
+        advantage += 0.5 if state.to_move == 0 else -0.5
+        return 1 / (1 + math.exp(-advantage / HEURISTIC_SCALE))
+
+    def _roll(self, state: GameState, roll: int) -> Tuple[int, int]:
+        """The coins after the player to move rolls `roll`, in the same order as `multiplayer`."""
+        mover = state.to_move
+        other = 1 - mover
+        mine = self._tables(state.hands[mover])
+        theirs = self._tables(state.hands[other])
+        coins = list(state.coins)
+        # Red cards are paid first, then the bank pays, then purple cards take from the other player.
+        paid = min(theirs.red_demand[roll], coins[mover])
+        coins[mover] -= paid
+        coins[other] += paid
+        coins[mover] += mine.my_income[roll]
+        coins[other] += theirs.other_income[roll]
+        paid = min(mine.take_from_each[roll] + mine.take_from_one[roll], coins[other])
+        coins[other] -= paid
+        coins[mover] += paid
+        return coins[0], coins[1]
+
+    def _follows_build_order(self, player: int) -> bool:
+        return player == 1 and self.opponent is not None
+
+    def _dice_choices(self, state: GameState) -> List[bool]:
+        hand = state.hands[state.to_move]
+        if self._follows_build_order(state.to_move):
+            two_dice = self._opponent_dice.get(hand)
+            if two_dice is None:
+                player_state = PlayerState(_NUM_PLAYERS, self.dice)
+                player_state.hand = Hand.from_counts(hand)
+                two_dice = self._opponent_dice[hand] = bool(ROLL_TWO_POLICIES[self.opponent.roll_two](player_state))
+            return [two_dice]
+        return [False, True] if hand[_TRAIN_STATION] else [False]
+
+    def _purchases(self, state: GameState, coins: Tuple[int, int]) -> List[Optional[int]]:
+        """The cards the player to move can buy, or None to buy nothing."""
+        mover = state.to_move
+        hand = state.hands[mover]
+        if self._follows_build_order(mover):
+            position = sum(hand) - _STARTING_CARDS
+            build_order = self.opponent.build_order
+            if position < len(build_order) and _COST[build_order[position]] <= coins[mover]:
+                return [build_order[position]]
+            return [None]
+        return [None] + [
+            i for i in range(cards.NUM_DISTINCT_CARDS)
+            if hand[i] < SUPPLY_LIMITS[i] and _COST[i] <= coins[mover]
+        ]
+
+    def _buy(self, state: GameState, coins: Tuple[int, int], card: Optional[int]) -> Tuple[GameState, bool]:
+        """The state after the player to move buys `card`, and whether they won."""
+        mover = state.to_move
+        hands = state.hands
+        if card is not None:
+            coins = (coins[0] - _COST[card], coins[1]) if mover == 0 else (coins[0], coins[1] - _COST[card])
+            hand = _add(hands[mover], card)
+            hands = (hand, hands[1]) if mover == 0 else (hands[0], hand)
+            if card in _VICTORY_IDS and all(hand[i] for i in _VICTORY_IDS):
+                return GameState(hands, coins, mover), True
+        return GameState(hands, coins, 1 - mover), False
+
+    def _best(self, state: GameState, values: List[float]) -> float:
+        return max(values) if state.to_move == 0 else min(values)
+
+    def _tick(self) -> None:
+        self._stats.nodes += 1
+        if self._stats.nodes & 255 == 0 and time.perf_counter() > self._deadline:
+            raise _OutOfTime()
+
+    def _turn_value(self, state: GameState, depth: int) -> float:
+        """The value of a state at the start of a turn, looking `depth` turns ahead."""
+        self._tick()
+        if depth == 0:
+            return self.heuristic(state)
+        key = (state, depth)
+        self._stats.lookups += 1
+        value = self.table.get(key)
+        if value is not None:
+            self._stats.hits += 1
+            return value
+
+        value = self._best(state, [self._dice_value(state, two_dice, depth) for two_dice in self._dice_choices(state)])
+        if len(self.table) >= self.max_entries:
+            # Forget the oldest entry, which dicts keep first.
+            del self.table[next(iter(self.table))]
+        self.table[key] = value
+        return value
+
+    def _dice_value(self, state: GameState, two_dice: bool, depth: int) -> float:
+        return sum(p * self._purchase_value(state, self._roll(state, roll), depth) for roll, p in self._rolls[two_dice])
+
+    def _purchase_value(self, state: GameState, coins: Tuple[int, int], depth: int) -> float:
+        """The value after the player to move has rolled and has `coins`, when they pick the best purchase."""
+        return self._best(state, [self._option_value(state, coins, card, depth) for card in self._purchases(state, coins)])
+
+    def _option_value(self, state: GameState, coins: Tuple[int, int], card: Optional[int], depth: int) -> float:
+        next_state, won = self._buy(state, coins, card)
+        if won:
+            return 1.0 if state.to_move == 0 else 0.0
+        return self._turn_value(next_state, depth - 1)
+
+    def _deepen(self, evaluate, choices: list, state: GameState, time_budget: float, max_depth: int):
+        """Score every choice one turn deeper at a time until the time budget runs out, and pick the best."""
+        self._stats = SearchStats()
+        start = time.perf_counter()
+        self._deadline = start + time_budget
+        best = choices[0]
+        try:
+            for depth in range(1, max_depth + 1):
+                values = [evaluate(choice, depth) for choice in choices]
+                best = choices[values.index(self._best(state, values))]
+                self._stats.depth = depth
+        except _OutOfTime:
+            pass
+        self._deadline = math.inf
+        self._stats.seconds = time.perf_counter() - start
+        return best, self._stats
+
+    def choose_dice(self, state: GameState, time_budget: float = 0.1, max_depth: int = 20) -> Tuple[bool, SearchStats]:
+        """Whether the player to move should roll two dice."""
+        return self._deepen(
+            lambda two_dice, depth: self._dice_value(state, two_dice, depth),
+            self._dice_choices(state), state, time_budget, max_depth)
+
+    def choose_purchase(self, state: GameState, time_budget: float = 0.1, max_depth: int = 20) -> Tuple[Optional[Card], SearchStats]:
+        """What the player to move should buy once they have rolled, given the coins in `state`."""
+        card, stats = self._deepen(
+            lambda card, depth: self._option_value(state, state.coins, card, depth),
+            self._purchases(state, state.coins), state, time_budget, max_depth)
+        return (cards.distinct_cards[card] if card is not None else None), stats
+
+class BestResponse(Strategy):
+    """
+    A strategy for `strategies.simulate` that searches each decision of a 2-player game with a `Solver`.
+
+    The player can't see the opponent, so the opponent is assumed to be where
+    `strategies.simulate` expects their build order to be at the start of each round.
+    `stats` holds the `SearchStats` of every decision made so far.
+    The solver's opponent must follow a build order, since there is nothing to simulate otherwise.
+    """
+    def __init__(self, solver: Solver, time_budget: float):
+        if solver.opponent is None:
+            raise ValueError("A best response needs a solver with an opponent that follows a build order.")
+        super().__init__(buy=self._buy, roll_two=self._roll_two)
+        self.solver = solver
+        self.time_budget = time_budget
+        self.stats: List[SearchStats] = []
+        self._round_number = 1
+        # The dice are asked for on every turn, and again for the log, so remember each decision.
+        self._dice: Dict[GameState, bool] = {}
+        rows = simulate(solver.opponent.to_strategy(), _NUM_PLAYERS, log="array", dice=solver.dice).rows
+        # The opponent's hand and coins at the end of each round, starting from round 0.
+        self._opponent: List[Tuple[Counts, int]] = []
+        hand = starting_hand()
+        for round_number in range(int(rows["Round"][-1]) + 1):
+            in_round = rows[rows["Round"] == round_number]
+            for i in in_round["Bought Card"]:
+                if i >= 0:
+                    hand.append(cards.distinct_cards[i])
+            self._opponent.append((tuple(int(n) for n in hand.counts), int(in_round["Coins"][-1])))
+
+    def _state(self, player_state: PlayerState, round_number: int) -> GameState:
+        opponent_hand, opponent_coins = self._opponent[min(round_number - 1, len(self._opponent) - 1)]
+        hand = tuple(int(n) for n in player_state.hand.counts)
+        # Only whole coins can be spent, so round the expected coins down.
+        return GameState((hand, opponent_hand), (int(player_state.coins), opponent_coins), 0)
+
+    def _buy(self, player_state: PlayerState, round_number: int) -> Optional[Card]:
+        self._round_number = round_number + 1
+        card, stats = self.solver.choose_purchase(self._state(player_state, round_number), self.time_budget)
+        self.stats.append(stats)
+        return card
+
+    def _roll_two(self, player_state: PlayerState) -> bool:
+        state = self._state(player_state, self._round_number)
+        two_dice = self._dice.get(state)
+        if two_dice is None:
+            two_dice, stats = self.solver.choose_dice(state, self.time_budget)
+            self.stats.append(stats)
+            self._dice[state] = two_dice
+        return two_dice
+
+def best_response(opponent: StrategySpec, time_budget: float = 0.1, dice: DiceModel = FAIR) -> BestResponse:
+    """
+    A `Strategy` for a 2-player game that searches each decision against an opponent playing `opponent`.
+
+    time_budget -- The seconds to search for each decision.
+    """
+    return BestResponse(Solver(opponent, dice=dice), time_budget)
@@ -0,0 +1,231 @@
+"""
+Simulate a build order one purchase at a time instead of one turn at a time.
+
+Between purchases the hand doesn't change, so in the expected value model of `strategies.simulate`
+the player gains the same amount on every one of their turns and the same amount on every other player's turn.
+The turns until the next card is affordable are added up with one `np.cumsum`,
+which adds in the same order as `strategies.simulate` does, so every coin count comes out exactly the same.
+Python only does work per purchase; the turns in between are only expanded into a log if it is asked for.
+"""
+import math
+
+import numpy as np
+
+from .dice import FAIR, DiceModel
+from .strategies import (
+    MAX_ROUNDS,
+    VICTORY_CARDS,
+    BuildOrder,
+    GameLog,
+    InvalidStrategyError,
+    PlayerState,
+    SimulationSummary,
+    Strategy
+)
+from dataclasses import dataclass
+from machi_koro.cards import Card
+from typing import List, Set
+
+@dataclass
+class Segment:
+    """
+    The turns from just after one purchase up to and including the turn of the next purchase.
+
+    start_round -- The round of the first purchase, or 0 for the start of the game.
+    skipped_turns -- The other players' turns left in `start_round` after the first purchase.
+    coins -- The player's coins after each turn of the segment, before paying for `card`.
+    card -- The card bought on the last turn of the segment.
+    expected_coins -- What `PlayerState.gross_expected_revenue` is for the hand during the segment.
+    num_cards -- The number of cards held during the segment, not counting victory cards.
+    num_victory_cards -- The number of victory cards held during the segment.
+    """
+    start_round: int
+    skipped_turns: int
+    coins: np.ndarray
+    card: Card
+    expected_coins: float
+    num_cards: int
+    num_victory_cards: int
+
+@dataclass
+class FastForward:
+    """
+    The purchases made by a build order, with enough to rebuild every turn of the game.
+
+    expected_coins -- The expected coins per roll after the last purchase.
+    """
+    num_players: int
+    segments: List[Segment]
+    expected_coins: float
+
+    @property
+    def rounds_to_win(self) -> int:
+        return int(self._turn_index(self.segments[-1])[-1]) // self.num_players + 1
+
+    def _turn_index(self, segment: Segment) -> np.ndarray:
+        """The turns of a segment, numbered from 0 at the first turn of the game."""
+        return segment.start_round * self.num_players - segment.skipped_turns + np.arange(len(segment.coins))
+
+    def coins(self) -> float:
+        """The player's coins after the winning purchase."""
+        last = self.segments[-1]
+        return float(last.coins[-1] - last.card.cost)
+
+    def summary(self) -> SimulationSummary:
+        """The same as `strategies.simulate` with `log="summary"`."""
+        scores_on: Set[int] = set()
+        for card in PlayerState(self.num_players).hand:
+            scores_on |= card.activates_on
+        for segment in self.segments:
+            scores_on |= segment.card.activates_on
+        return SimulationSummary(
+            rounds_to_win=self.rounds_to_win,
+            max_expected_coins_per_roll=max([s.expected_coins for s in self.segments] + [self.expected_coins]),
+            scores_on=scores_on)
+
+    def to_game_log(self) -> GameLog:
+        """Expand every turn into the same `GameLog` that `strategies.simulate` keeps with `log="array"`."""
+        n = self.num_players
+        rows = np.zeros(1 + sum(len(s.coins) for s in self.segments), dtype=GameLog.DTYPE)
+        first = self.segments[0]
+        rows[0] = (0, 0, PlayerState(n).coins, first.expected_coins, first.num_cards, first.num_victory_cards, -1)
+        start = 1
+        for i, segment in enumerate(self.segments):
+            stop = start + len(segment.coins)
+            turn_index = self._turn_index(segment)
+            block = rows[start:stop]
+            block["Round"] = turn_index // n + 1
+            block["Turn"] = turn_index % n + 1
+            block["Coins"] = segment.coins
+            block["Expected Coins per Roll"] = segment.expected_coins
+            block["# Cards"] = segment.num_cards
+            block["# Victory Cards"] = segment.num_victory_cards
+            block["Bought Card"] = -1
+
+            # On the last turn, the card has been bought.
+            is_victory_card = segment.card in VICTORY_CARDS
+            last = block[-1:]
+            last["Coins"] = segment.coins[-1] - segment.card.cost
+            last["Expected Coins per Roll"] = (
+                self.segments[i + 1].expected_coins if i + 1 < len(self.segments) else self.expected_coins)
+            last["# Cards"] = segment.num_cards + (not is_victory_card)
+            last["# Victory Cards"] = segment.num_victory_cards + is_victory_card
+            last["Bought Card"] = segment.card.id
+            start = stop
+        return GameLog.from_rows(rows)
+
+@dataclass
+class Position:
+    """
+    Where a build order stands just after a purchase, or at the start of the game.
+
+    coins -- The player's coins after paying for the purchase.
+    round_number -- The round of the purchase, or 0 for the start of the game.
+    skipped_turns -- The other players' turns left in `round_number` after the purchase.
+    """
+    player_state: PlayerState
+    coins: float
+    round_number: int
+    skipped_turns: int
+    num_cards: int
+    num_victory_cards: int
+
+    @staticmethod
+    def start(num_players: int, dice: DiceModel = FAIR) -> "Position":
+        player_state = PlayerState(num_players, dice)
+        num_victory_cards = sum(player_state.hand.count(c) for c in VICTORY_CARDS)
+        return Position(
+            player_state=player_state,
+            coins=player_state.coins,
+            round_number=0,
+            skipped_turns=0,
+            num_cards=len(player_state.hand) - num_victory_cards,
+            num_victory_cards=num_victory_cards)
+
+    def copy(self) -> "Position":
+        return Position(self.player_state.copy(), self.coins, self.round_number, self.skipped_turns,
+                        self.num_cards, self.num_victory_cards)
+
+    def is_winner(self) -> bool:
+        return self.player_state.is_winner()
+
+def advance(position: Position, card: Card, strategy: Strategy) -> Segment:
+    """Play from `position` until `card` is bought, moving `position` to just after the purchase."""
+    player_state = position.player_state
+    num_players = player_state.num_players
+    coins = position.coins
+    round_number = position.round_number
+    skipped_turns = position.skipped_turns
+
+    revenue = player_state.expected_revenue()
+    two_dice = player_state.roll_two(strategy)
+    my_turn = revenue.my_turn(two_dice)
+    other_turn = revenue.other_turn
+    per_round = my_turn + (num_players - 1) * other_turn
+
+    # Guess how many rounds it takes to afford the card, then look one round further in case of rounding.
+    shortfall = card.cost - coins - skipped_turns * other_turn - my_turn
+    if shortfall <= 0:
+        rounds = 1
+    elif per_round > 0:
+        rounds = math.ceil(shortfall / per_round) + 2
+    else:
+        rounds = MAX_ROUNDS
+    rounds = min(rounds, MAX_ROUNDS - round_number)
+
+    one_round = np.full(num_players, other_turn)
+    one_round[0] = my_turn
+    while True:
+        increments = np.empty(1 + skipped_turns + rounds * num_players)
+        increments[0] = coins
+        increments[1:1 + skipped_turns] = other_turn
+        increments[1 + skipped_turns:] = np.tile(one_round, rounds)
+        trajectory = increments.cumsum()[1:]
+        affordable = (trajectory[skipped_turns::num_players] >= card.cost).nonzero()[0]
+        if len(affordable) > 0:
+            break
+        if round_number + rounds >= MAX_ROUNDS:
+            raise InvalidStrategyError(f"The strategy does not buy all four victory cards within {MAX_ROUNDS} rounds.")
+        rounds = min(2 * rounds, MAX_ROUNDS - round_number)
+
+    purchase = skipped_turns + affordable[0] * num_players
+    segment = Segment(
+        start_round=round_number,
+        skipped_turns=skipped_turns,
+        coins=trajectory[:purchase + 1],
+        card=card,
+        expected_coins=revenue.gross(two_dice, num_players),
+        num_cards=position.num_cards,
+        num_victory_cards=position.num_victory_cards)
+
+    position.coins = float(trajectory[purchase]) - card.cost
+    position.round_number = round_number + int(affordable[0]) + 1
+    position.skipped_turns = num_players - 1
+    player_state._add_card(card)
+    if card in VICTORY_CARDS:
+        position.num_victory_cards += 1
+    else:
+        position.num_cards += 1
+    return segment
+
+def simulate(strategy: Strategy, num_players: int, dice: DiceModel = FAIR) -> FastForward:
+    """
+    Play a build order strategy under the same model as `strategies.simulate`, skipping from purchase to purchase.
+
+    The strategy must buy from a `BuildOrder`, and its `roll_two` predicate must be marked `hand_only`.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+    if not isinstance(strategy.buy, BuildOrder):
+        raise TypeError("Skipping to each purchase needs a strategy that buys from a `BuildOrder`.")
+    if not getattr(strategy.roll_two, "hand_only", False):
+        raise TypeError("Skipping to each purchase needs a dice policy marked `hand_only`.")
+
+    position = Position.start(num_players, dice)
+    segments = []
+    for card in strategy.buy.cards:
+        segments.append(advance(position, card, strategy))
+        if card in VICTORY_CARDS and position.is_winner():
+            return FastForward(num_players, segments, position.player_state.gross_expected_revenue(strategy))
+
+    raise InvalidStrategyError("The strategy does not buy all four victory cards.")
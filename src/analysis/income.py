@@ -0,0 +1,123 @@
+"""
+The probability distribution of a hand's income, not just its expected value.
+
+Income follows the same model as `strategies.simulate`: on your turn your blue, green and purple cards pay
+for the roll you make, and on each other player's turn your red and blue cards pay for a single die.
+Since each turn is independent, the income over many turns is the convolution of the income of each turn.
+Convolving many times is done all at once by raising the Fourier transform of one round to a power.
+
+Distributions are arrays of probabilities indexed by a number of coins.
+"""
+import numpy as np
+
+from .cards import COLORS_ACTIVATED_ON_MY_TURN, COLORS_ACTIVATED_ON_OTHER_TURN, roll_distribution
+from .dice import FAIR, DiceModel
+from .strategies import income_by_roll
+from dataclasses import dataclass
+from machi_koro.cards import Hand
+
+@dataclass
+class IncomeDistribution:
+    """
+    The probability of getting each number of coins.
+
+    probabilities -- The probability of each number of coins, indexed by coins.
+    """
+    probabilities: np.ndarray
+
+    def mean(self) -> float:
+        return float(np.arange(len(self.probabilities)) @ self.probabilities)
+
+    def std(self) -> float:
+        coins = np.arange(len(self.probabilities))
+        return float(np.sqrt(((coins - self.mean()) ** 2) @ self.probabilities))
+
+    def cdf(self) -> np.ndarray:
+        """The probability of getting at most each number of coins."""
+        return np.cumsum(self.probabilities)
+
+    def quantile(self, q: float) -> int:
+        """The smallest number of coins that is gotten at least a fraction `q` of the time."""
+        # Allow for the rounding error of the Fourier transform.
+        return int(np.searchsorted(self.cdf(), q - 1e-12))
+
+    def probability_at_least(self, coins: int) -> float:
+        """The probability of getting `coins` or more."""
+        if coins <= 0:
+            return 1.0
+        return float(self.probabilities[coins:].sum())
+
+def _distribution(income: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+    """Add up the probability of the rolls that pay each number of coins."""
+    return np.bincount(income.astype(np.int64), weights=probabilities)
+
+def turn_distribution(hand: Hand, num_players: int, two_dice: bool, my_turn: bool = True, dice: DiceModel = FAIR) -> IncomeDistribution:
+    """
+    The distribution of a hand's income on one turn.
+
+    my_turn -- Whether it is your turn. On other players' turns, they are assumed to roll one die.
+    """
+    if my_turn:
+        income = income_by_roll(hand, num_players, COLORS_ACTIVATED_ON_MY_TURN)
+        return IncomeDistribution(_distribution(income, roll_distribution(two_dice, dice)))
+    else:
+        income = income_by_roll(hand, num_players, COLORS_ACTIVATED_ON_OTHER_TURN)
+        return IncomeDistribution(_distribution(income, roll_distribution(False, dice)))
+
+def round_distribution(hand: Hand, num_players: int, two_dice: bool, dice: DiceModel = FAIR) -> IncomeDistribution:
+    """The distribution of a hand's income over your turn and every other player's turn."""
+    probabilities = turn_distribution(hand, num_players, two_dice, True, dice).probabilities
+    other_turn = turn_distribution(hand, num_players, two_dice, False, dice).probabilities
+    for _ in range(num_players - 1):
+        probabilities = np.convolve(probabilities, other_turn)
+    return IncomeDistribution(probabilities)
+
+def _fft_size(n: int) -> int:
+    """A size for the Fourier transform at least `n` long, padded to a power of 2 so it is fast."""
+    return 1 << max(0, n - 1).bit_length()
+
+def repeated_distribution(distribution: IncomeDistribution, k: int) -> IncomeDistribution:
+    """The distribution of the total of `k` independent draws from `distribution`."""
+    if k == 0:
+        return IncomeDistribution(np.ones(1))
+    p = distribution.probabilities
+    length = k * (len(p) - 1) + 1
+    size = _fft_size(length)
+    total = np.fft.irfft(np.fft.rfft(p, size) ** k, size)[:length]
+    return IncomeDistribution(np.clip(total, 0, None))
+
+def income_over_rounds(hand: Hand, num_players: int, rounds: int, two_dice: bool, dice: DiceModel = FAIR) -> IncomeDistribution:
+    """The distribution of a hand's income over `rounds` whole rounds."""
+    return repeated_distribution(round_distribution(hand, num_players, two_dice, dice), rounds)
+
+def probability_to_afford(
+    hand: Hand,
+    num_players: int,
+    cost: int,
+    rounds: int,
+    two_dice: bool,
+    coins: int = 0,
+    dice: DiceModel = FAIR
+) -> np.ndarray:
+    """
+    The probability of having at least `cost` coins to buy with on your turn in each of the next `rounds` rounds,
+    without buying anything, indexed by the number of rounds from 1 through `rounds`.
+    You go first in each round, as in `strategies.simulate`, so the other players' turns in a round
+    only pay after you have had the chance to buy.
+
+    coins -- The coins you have now.
+    """
+    needed = cost - coins
+    if needed <= 0:
+        return np.ones(rounds)
+    # Income is never negative, so only the chance of ending up short of `needed` has to be tracked,
+    # which keeps each step as short as the cost no matter how many rounds are played.
+    my_turn = turn_distribution(hand, num_players, two_dice, True, dice).probabilities[:needed]
+    per_round = round_distribution(hand, num_players, two_dice, dice).probabilities[:needed]
+    # The chance of being short after the whole rounds before this one.
+    short = np.ones(1)
+    probabilities = np.empty(rounds)
+    for i in range(rounds):
+        probabilities[i] = 1 - np.convolve(short, my_turn)[:needed].sum()
+        short = np.convolve(short, per_round)[:needed]
+    return np.clip(probabilities, 0, 1)
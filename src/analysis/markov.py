@@ -0,0 +1,144 @@
+"""
+Compute the exact distribution of rounds to win for a build order with real dice rolls.
+
+Playing a build order is an absorbing Markov chain.
+The state at the start of a round is how far along the build order the player is and how many coins they have.
+Each round, the player's roll moves their coins by one of a few amounts,
+they buy the next card if they can afford it, and then every other player's roll adds a few more.
+Owning every victory card is the absorbing state.
+
+The transition matrix is sparse: from any state, only a few dozen others can be reached in a round.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from .cards import roll_distribution
+from .dice import FAIR, DiceModel
+from .monte_carlo import game_tables
+from .strategies import PlayerState, Strategy
+
+# Buying no cards except for the victory cards, in any order, is expected to win in well under 100 rounds.
+# Real dice can be unlucky, so allow more slack than `strategies.simulate` does.
+MAX_ROUNDS = 200
+
+# Coins beyond this are treated as this many.
+# It only needs to be a little more than the most expensive card in the build order.
+MAX_COINS = 300
+
+@dataclass
+class RoundsToWinDistribution:
+    """
+    The exact probability of winning in each round.
+
+    probabilities -- The probability of winning in each round, indexed by round number.
+    unfinished -- The probability of not having won after `MAX_ROUNDS` rounds.
+    expected -- The expected number of rounds to win, counting every round it could take.
+    """
+    probabilities: np.ndarray
+    unfinished: float
+    expected: float
+
+    def distribution(self) -> np.ndarray:
+        return self.probabilities
+
+    def mean(self) -> float:
+        return self.expected
+
+    def quantile(self, q: float) -> int:
+        """The smallest round by which the player has won with probability at least `q`."""
+        index = int(np.searchsorted(np.cumsum(self.probabilities), q))
+        if index == len(self.probabilities):
+            raise ValueError(f"The player wins within {MAX_ROUNDS} rounds with less than {q:.0%} probability.")
+        return index
+
+def _pmf(incomes: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+    """The probability of each amount of income given the income and probability of each roll."""
+    return np.bincount(incomes, weights=probabilities)
+
+def _transition_matrix(strategy: Strategy, num_players: int, max_coins: int, dice: DiceModel):
+    """
+    Build the matrix of probabilities of moving between states in a round.
+
+    States are numbered `position * (max_coins + 1) + coins`, and the last column is the absorbing state.
+    """
+    tables = game_tables(strategy, num_players)
+    positions = tables.winning_position
+    num_coins = max_coins + 1
+    if tables.cost[:positions].max() > max_coins:
+        raise ValueError(f"max_coins must be at least the cost of the most expensive card ({tables.cost[:positions].max()}).")
+
+    one_die = roll_distribution(False, dice)
+    two_dice = roll_distribution(True, dice)
+    rows, columns, values = [], [], []
+    for position in range(positions):
+        my_turn = _pmf(tables.my_income[position], two_dice if tables.roll_two[position] else one_die)
+        coins = np.arange(num_coins)
+        for income in np.flatnonzero(my_turn):
+            after_income = np.minimum(coins + income, max_coins)
+            can_buy = after_income >= tables.cost[position]
+            # Assume that other players always roll one die.
+            for bought in (False, True):
+                start = coins[can_buy == bought]
+                if len(start) == 0:
+                    continue
+                after_buying = after_income[can_buy == bought] - bought * tables.cost[position]
+                next_position = position + bought
+                if next_position == positions:
+                    rows.append(position * num_coins + start)
+                    columns.append(np.full(len(start), positions * num_coins))
+                    values.append(np.full(len(start), my_turn[income]))
+                    continue
+                other_turns = np.array([1.0])
+                other_turn = _pmf(tables.other_income[next_position], one_die)
+                for _ in range(num_players - 1):
+                    other_turns = np.convolve(other_turns, other_turn)
+                for other_income in np.flatnonzero(other_turns):
+                    rows.append(position * num_coins + start)
+                    columns.append(next_position * num_coins + np.minimum(after_buying + other_income, max_coins))
+                    values.append(np.full(len(start), my_turn[income] * other_turns[other_income]))
+
+    size = positions * num_coins + 1
+    return scipy.sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(size, size))
+
+def rounds_to_win(
+    strategy: Strategy,
+    num_players: int,
+    max_coins: int = MAX_COINS,
+    dice: DiceModel = FAIR
+) -> RoundsToWinDistribution:
+    """
+    Compute the exact distribution of rounds it takes a strategy to win with real dice.
+
+    This is the exact counterpart of `monte_carlo.simulate`,
+    so the strategy must buy from a `BuildOrder` and its `roll_two` predicate may only depend on the player's hand.
+
+    dice -- The dice everyone rolls.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+
+    transitions = _transition_matrix(strategy, num_players, max_coins, dice)
+    absorbing = transitions.shape[0] - 1
+    transient = transitions[:absorbing, :absorbing]
+    to_absorbing = transitions[:absorbing, absorbing].toarray().ravel()
+
+    state = np.zeros(absorbing)
+    state[PlayerState(num_players).coins] = 1.0
+    probabilities = np.zeros(MAX_ROUNDS + 1)
+    for round_number in range(1, MAX_ROUNDS + 1):
+        probabilities[round_number] = state @ to_absorbing
+        state = transient.T @ state
+
+    # The expected time to absorption `t` solves (I - Q) t = 1.
+    expected = scipy.sparse.linalg.spsolve(
+        (scipy.sparse.identity(absorbing, format='csc') - transient.tocsc()),
+        np.ones(absorbing))
+    return RoundsToWinDistribution(
+        probabilities=np.trim_zeros(probabilities, 'b'),
+        unfinished=float(state.sum()),
+        expected=float(expected[PlayerState(num_players).coins]))
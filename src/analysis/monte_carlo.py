@@ -0,0 +1,185 @@
+"""
+Play many games of a strategy with real dice rolls instead of expected values.
+
+All games are advanced together one turn at a time with NumPy arrays.
+Every game follows the same build order, so a game's hand is determined entirely by
+how far along the build order it is. That lets the income for every hand and roll
+be tabulated once up front; a turn is then a table lookup per game.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .cards import COLORS_ACTIVATED_ON_MY_TURN, COLORS_ACTIVATED_ON_OTHER_TURN
+from .dice import FACES, FAIR, DiceModel
+from .strategies import (
+    VICTORY_CARDS,
+    BuildOrder,
+    InvalidStrategyError,
+    PlayerState,
+    Strategy,
+    income_by_roll
+)
+
+# Buying no cards except for the victory cards, in any order, is expected to win in well under 100 rounds.
+# Real dice can be unlucky, so allow more slack than `strategies.simulate` does.
+MAX_ROUNDS = 200
+
+# Enough games to amortize the per-turn overhead without using too much memory.
+BATCH_SIZE = 1 << 18
+
+@dataclass
+class RoundsToWin:
+    """
+    The distribution of the number of rounds it took to win over many games.
+
+    counts -- The number of games won in each round, indexed by round number.
+    unfinished -- The number of games that had not won after `MAX_ROUNDS` rounds.
+    """
+    counts: np.ndarray
+    unfinished: int
+
+    @property
+    def num_games(self) -> int:
+        return int(self.counts.sum()) + self.unfinished
+
+    def distribution(self) -> np.ndarray:
+        """The probability of winning in each round, indexed by round number."""
+        return self.counts / self.num_games
+
+    def mean(self) -> float:
+        """The average number of rounds to win among games that finished."""
+        rounds = np.arange(len(self.counts))
+        return float(rounds @ self.counts / self.counts.sum())
+
+    def std(self) -> float:
+        rounds = np.arange(len(self.counts))
+        mean = self.mean()
+        return float(np.sqrt(((rounds - mean) ** 2) @ self.counts / self.counts.sum()))
+
+    def quantile(self, q: float) -> int:
+        """The smallest round by which at least a fraction `q` of all games were won."""
+        cumulative = np.cumsum(self.counts) / self.num_games
+        index = int(np.searchsorted(cumulative, q))
+        if index == len(cumulative):
+            raise ValueError(f"Fewer than {q:.0%} of the games finished.")
+        return index
+
+    def unfinished_rate(self) -> float:
+        """How often the strategy failed to win within `MAX_ROUNDS` rounds."""
+        return self.unfinished / self.num_games
+
+@dataclass
+class GameTables:
+    """What happens on a turn at each position along a build order."""
+    # Indexed by [build order position, roll].
+    my_income: np.ndarray
+    other_income: np.ndarray
+    # Indexed by build order position.
+    roll_two: np.ndarray
+    cost: np.ndarray
+    winning_position: int
+
+def game_tables(strategy: Strategy, num_players: int) -> GameTables:
+    """Tabulate the income and purchases along a strategy's build order."""
+    if not isinstance(strategy.buy, BuildOrder):
+        raise TypeError("Monte Carlo simulation needs a strategy that buys from a `BuildOrder`.")
+
+    build_order = strategy.buy.cards
+    hands = strategy.buy.hands()
+    winning_position = next(
+        (i for i, hand in enumerate(hands) if all(c in hand for c in VICTORY_CARDS)),
+        None)
+    if winning_position is None:
+        raise InvalidStrategyError("The strategy does not buy all four victory cards.")
+
+    # The dice policy only gets to see the hand, which is all a position tells us.
+    player_state = PlayerState(num_players)
+    roll_two = []
+    for hand in hands:
+        player_state.hand = hand
+        roll_two.append(strategy.roll_two(player_state))
+
+    return GameTables(
+        my_income=np.array([income_by_roll(h, num_players, COLORS_ACTIVATED_ON_MY_TURN) for h in hands], dtype=np.int32),
+        other_income=np.array([income_by_roll(h, num_players, COLORS_ACTIVATED_ON_OTHER_TURN) for h in hands], dtype=np.int32),
+        roll_two=np.array(roll_two, dtype=bool),
+        # Nothing is left to buy once the build order runs out.
+        cost=np.array([c.cost for c in build_order] + [np.iinfo(np.int32).max], dtype=np.int32),
+        winning_position=winning_position)
+
+def roll_dice(dice: DiceModel, num_players: int, num_games: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Roll the dice for a round of every game, indexed by [die, game].
+    The first two rows are the dice for the player we're keeping track of, and each other player gets a row.
+    """
+    if dice == FAIR:
+        return rng.integers(1, FACES + 1, size=(num_players + 1, num_games), dtype=np.int8)
+    faces = np.arange(1, FACES + 1, dtype=np.int8)
+    first = dice.roll_distribution(False)[1:FACES + 1]
+    second = np.array(dice.second) / sum(dice.second)
+    rolls = rng.choice(faces, size=(num_players + 1, num_games), p=first)
+    rolls[1] = rng.choice(faces, size=num_games, p=second)
+    return rolls
+
+def play_batch(tables: GameTables, num_players: int, num_games: int, rng: np.random.Generator, dice: DiceModel = FAIR) -> np.ndarray:
+    """Play a batch of games from `game_tables` and return the round each one was won in (0 if it never was)."""
+    rounds_to_win = np.zeros(num_games, dtype=np.int16)
+    # Only the games still in progress are kept in these arrays.
+    game = np.arange(num_games)
+    coins = np.full(num_games, PlayerState(num_players).coins, dtype=np.int32)
+    position = np.zeros(num_games, dtype=np.intp)
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        rolls = roll_dice(dice, num_players, len(game), rng)
+
+        # Assume the one player we're keeping track of goes first in each round.
+        roll = rolls[0] + tables.roll_two[position] * rolls[1]
+        coins += tables.my_income[position, roll]
+        can_buy = coins >= tables.cost[position]
+        coins -= can_buy * tables.cost[position]
+        position += can_buy
+
+        won = position == tables.winning_position
+        if won.any():
+            rounds_to_win[game[won]] = round_number
+            still_playing = ~won
+            game, coins, position, rolls = game[still_playing], coins[still_playing], position[still_playing], rolls[:, still_playing]
+            if len(game) == 0:
+                break
+
+        # Assume that other players always roll one die.
+        for turn in range(2, num_players + 1):
+            coins += tables.other_income[position, rolls[turn]]
+
+    return rounds_to_win
+
+def simulate(
+    strategy: Strategy,
+    num_players: int,
+    num_games: int,
+    seed: Optional[int] = None,
+    dice: DiceModel = FAIR
+) -> RoundsToWin:
+    """
+    Play a strategy `num_games` times with random dice to see how many rounds it takes to win.
+
+    The strategy must buy from a `BuildOrder`,
+    and its `roll_two` predicate may only depend on the player's hand.
+
+    dice -- The dice everyone rolls.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+
+    tables = game_tables(strategy, num_players)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(MAX_ROUNDS + 1, dtype=np.int64)
+    for start in range(0, num_games, BATCH_SIZE):
+        rounds_to_win = play_batch(tables, num_players, min(BATCH_SIZE, num_games - start), rng, dice)
+        counts += np.bincount(rounds_to_win, minlength=MAX_ROUNDS + 1)
+
+    unfinished = int(counts[0])
+    counts[0] = 0
+    return RoundsToWin(np.trim_zeros(counts, 'b'), unfinished)
@@ -0,0 +1,191 @@
+"""
+Play whole games of Machi Koro with real dice, where every seat at the table runs its own strategy.
+
+Unlike `strategies.simulate` and `monte_carlo.simulate`, which follow one player and treat everyone else as passive,
+coins move between players here:
+red cards take coins from the player who rolled, and the Stadium and TV Station take coins from the other players.
+
+Many games are played at once with NumPy arrays holding every player's coins and progress.
+Each strategy must buy from a `BuildOrder`, so as in `monte_carlo`, a player's hand is determined by how far along
+their build order they are, and each turn is a few table lookups for every game at once.
+
+The Amusement Park and Radio Tower have no effect, and the Business Center never trades,
+the same as everywhere else in the analysis.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .cards import activation_table, revenue_kernel
+from .dice import FAIR, DiceModel
+from .monte_carlo import MAX_ROUNDS, game_tables, roll_dice
+from .strategies import PlayerState, Strategy, income_by_roll
+from machi_koro import cards
+from machi_koro.cards import Color, Hand
+
+# Enough games to amortize the per-turn overhead without using too much memory.
+BATCH_SIZE = 1 << 17
+
+_STADIUM = cards.card_id(cards.Stadium())
+_TV_STATION = cards.card_id(cards.TvStation())
+
+@dataclass
+class SeatTables:
+    """What happens to one seat at each position along its build order, indexed by [position, roll]."""
+    # Paid by the bank on the seat's own turn.
+    my_income: np.ndarray
+    # Paid by the bank on another player's turn.
+    other_income: np.ndarray
+    # Taken from the player who rolled on another player's turn.
+    red_demand: np.ndarray
+    # Taken from every other player on the seat's own turn.
+    take_from_each: np.ndarray
+    # Taken from the richest other player on the seat's own turn.
+    take_from_one: np.ndarray
+    # Indexed by position.
+    roll_two: np.ndarray
+    cost: np.ndarray
+    winning_position: int
+
+def purple_income(hand: Hand, num_players: int, card_id: int) -> np.ndarray:
+    """The coins one purple card takes for each roll from 0 through 12."""
+    revenue = revenue_kernel(num_players).revenue(hand.counts)[card_id]
+    return activation_table()[:, card_id] * hand.counts[card_id] * revenue
+
+def seat_tables(strategy: Strategy, num_players: int) -> SeatTables:
+    """Tabulate a seat's income, transfers and purchases along its build order."""
+    tables = game_tables(strategy, num_players)
+    hands = strategy.buy.hands()
+    return SeatTables(
+        my_income=np.array([income_by_roll(h, num_players, [Color.BLUE, Color.GREEN]) for h in hands], dtype=np.int32),
+        other_income=np.array([income_by_roll(h, num_players, [Color.BLUE]) for h in hands], dtype=np.int32),
+        red_demand=np.array([income_by_roll(h, num_players, [Color.RED]) for h in hands], dtype=np.int32),
+        # The Stadium's revenue already counts every other player.
+        take_from_each=np.array([purple_income(h, num_players, _STADIUM) // (num_players - 1) for h in hands], dtype=np.int32),
+        take_from_one=np.array([purple_income(h, num_players, _TV_STATION) for h in hands], dtype=np.int32),
+        roll_two=tables.roll_two,
+        cost=tables.cost,
+        winning_position=tables.winning_position)
+
+@dataclass
+class TableResults:
+    """
+    Who won each game and when.
+
+    num_players -- The number of seats at the table.
+    winner -- The seat that won each game, or -1 if nobody won within `MAX_ROUNDS` rounds.
+    rounds -- The round each game was won in, or 0 if nobody won.
+    """
+    num_players: int
+    winner: np.ndarray
+    rounds: np.ndarray
+
+    @property
+    def num_games(self) -> int:
+        return len(self.winner)
+
+    def win_rates(self) -> np.ndarray:
+        """How often each seat won, indexed by seat."""
+        return np.bincount(self.winner[self.winner >= 0], minlength=self.num_players) / self.num_games
+
+    def mean_rounds(self) -> float:
+        """The average number of rounds among games that somebody won."""
+        return float(self.rounds[self.rounds > 0].mean())
+
+    def unfinished_rate(self) -> float:
+        return float((self.winner < 0).mean())
+
+def _transfer(coins: np.ndarray, payer: int, payee: int, amount: np.ndarray) -> None:
+    """Move coins between two seats in every game, with nobody paying more than they have."""
+    paid = np.minimum(amount, coins[:, payer])
+    coins[:, payer] -= paid
+    coins[:, payee] += paid
+
+def _play_batch(tables: List[SeatTables], num_games: int, rng: np.random.Generator, dice: DiceModel) -> TableResults:
+    num_players = len(tables)
+    winner = np.full(num_games, -1, dtype=np.int8)
+    rounds = np.zeros(num_games, dtype=np.int16)
+    # Only the games still in progress are kept in these arrays.
+    game = np.arange(num_games)
+    coins = np.full((num_games, num_players), PlayerState(num_players).coins, dtype=np.int32)
+    position = np.zeros((num_games, num_players), dtype=np.intp)
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        for roller in range(num_players):
+            mine = tables[roller]
+            rolls = roll_dice(dice, 1, len(game), rng)
+            roll = rolls[0] + mine.roll_two[position[:, roller]] * rolls[1]
+
+            # Red cards are paid out first, starting with the player to the right of the one who rolled.
+            for offset in range(1, num_players):
+                owner = (roller - offset) % num_players
+                demand = tables[owner].red_demand[position[:, owner], roll]
+                _transfer(coins, roller, owner, demand)
+
+            # Then the bank pays for blue and green cards.
+            for seat in range(num_players):
+                if seat == roller:
+                    coins[:, seat] += mine.my_income[position[:, seat], roll]
+                else:
+                    coins[:, seat] += tables[seat].other_income[position[:, seat], roll]
+
+            # Then purple cards take from the other players.
+            take_from_each = mine.take_from_each[position[:, roller], roll]
+            take_from_one = mine.take_from_one[position[:, roller], roll]
+            if take_from_each.any():
+                for seat in range(num_players):
+                    if seat != roller:
+                        _transfer(coins, seat, roller, take_from_each)
+            if take_from_one.any():
+                others = coins.copy()
+                others[:, roller] = -1
+                target = others.argmax(axis=1)
+                games = np.arange(len(game))
+                paid = np.minimum(take_from_one, coins[games, target])
+                coins[games, target] -= paid
+                coins[:, roller] += paid
+
+            cost = mine.cost[position[:, roller]]
+            can_buy = coins[:, roller] >= cost
+            coins[:, roller] -= can_buy * cost
+            position[:, roller] += can_buy
+
+            won = position[:, roller] == mine.winning_position
+            if won.any():
+                winner[game[won]] = roller
+                rounds[game[won]] = round_number
+                still_playing = ~won
+                game, coins, position = game[still_playing], coins[still_playing], position[still_playing]
+                if len(game) == 0:
+                    return TableResults(num_players, winner, rounds)
+
+    return TableResults(num_players, winner, rounds)
+
+def simulate(
+    strategies: Sequence[Strategy],
+    num_games: int,
+    seed: Optional[int] = None,
+    dice: DiceModel = FAIR
+) -> TableResults:
+    """
+    Play `num_games` games with a seat for each strategy, in turn order.
+
+    Each strategy must buy from a `BuildOrder`, and its `roll_two` predicate may only depend on the player's hand.
+
+    dice -- The dice everyone rolls.
+    """
+    num_players = len(strategies)
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+
+    tables = [seat_tables(strategy, num_players) for strategy in strategies]
+    rng = np.random.default_rng(seed)
+    batches = [
+        _play_batch(tables, min(BATCH_SIZE, num_games - start), rng, dice)
+        for start in range(0, num_games, BATCH_SIZE)
+    ]
+    return TableResults(
+        num_players=num_players,
+        winner=np.concatenate([b.winner for b in batches]) if batches else np.zeros(0, dtype=np.int8),
+        rounds=np.concatenate([b.rounds for b in batches]) if batches else np.zeros(0, dtype=np.int16))
@@ -0,0 +1,133 @@
+"""
+Simulate many build orders that start with the same cards without replaying their common starts.
+
+Searching and tuning build orders evaluates thousands of variants that share long prefixes,
+such as every build order starting with Ranch, Ranch, Forest, Train Station.
+A `SimulationCache` keeps a trie with one node per purchase, holding the `fast_forward.Position` just after it
+and the `fast_forward.Segment` of turns that led up to it.
+A new build order walks down the trie as far as its cards match and only plays the turns after that.
+
+The cache holds at most `max_snapshots` nodes.
+When it is full, the least recently used node is evicted.
+That node is always a leaf, because using a node also uses every node above it.
+"""
+from .dice import FAIR, DiceModel
+from .fast_forward import FastForward, Position, Segment, advance
+from .strategies import VICTORY_CARDS, GameLog, InvalidStrategyError, SimulationSummary, Strategy, StrategySpec
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from machi_koro import cards
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Each snapshot is a few hundred bytes plus 8 bytes for each turn in its segment.
+DEFAULT_MAX_SNAPSHOTS = 100_000
+
+@dataclass(eq=False)
+class _Node:
+    """A purchase in the trie. The root of each trie is the start of the game and has no segment."""
+    position: Position
+    segment: Optional[Segment]
+    parent: Optional["_Node"]
+    card_id: int
+    children: Dict[int, "_Node"] = field(default_factory=dict)
+
+class SimulationCache:
+    """
+    A trie of the purchases made by build orders, shared by every build order simulated through it.
+
+    num_players, dice -- The game every build order is simulated in.
+    max_snapshots -- The most purchases to remember.
+    """
+    def __init__(self, num_players: int, dice: DiceModel = FAIR, max_snapshots: int = DEFAULT_MAX_SNAPSHOTS):
+        if not (2 <= num_players <= 4):
+            raise ValueError()
+        self.num_players = num_players
+        self.dice = dice
+        self.max_snapshots = max_snapshots
+        # One trie for each dice policy, since the policy changes how every turn is played.
+        self._roots: Dict[str, _Node] = {}
+        # Every node below a root, least recently used first.
+        self._nodes: "OrderedDict[_Node, None]" = OrderedDict()
+        self.turns_skipped = 0
+        self.turns_played = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def fraction_skipped(self) -> float:
+        """The fraction of all turns simulated through the cache that were resumed from a snapshot instead of played."""
+        total = self.turns_skipped + self.turns_played
+        return self.turns_skipped / total if total else 0.0
+
+    def clear(self) -> None:
+        self._roots.clear()
+        self._nodes.clear()
+        self.turns_skipped = 0
+        self.turns_played = 0
+        self.evictions = 0
+
+    def _root(self, roll_two: str) -> _Node:
+        root = self._roots.get(roll_two)
+        if root is None:
+            root = self._roots[roll_two] = _Node(Position.start(self.num_players, self.dice), None, None, -1)
+        return root
+
+    def _touch(self, path: List[_Node]) -> None:
+        # Mark the deepest node first, so every node ends up more recently used than the nodes below it.
+        for node in reversed(path):
+            self._nodes[node] = None
+            self._nodes.move_to_end(node)
+
+    def _evict(self) -> None:
+        while len(self._nodes) > self.max_snapshots:
+            node, _ = self._nodes.popitem(last=False)
+            del node.parent.children[node.card_id]
+            self.evictions += 1
+
+    def fast_forward(self, strategy: StrategySpec) -> FastForward:
+        """The same as `fast_forward.simulate`, resuming from the longest prefix of the build order already played."""
+        to_strategy = strategy.to_strategy()
+        node = self._root(strategy.roll_two)
+        path: List[_Node] = []
+        try:
+            for card_id in strategy.build_order:
+                child = node.children.get(card_id)
+                if child is not None:
+                    self.turns_skipped += len(child.segment.coins)
+                else:
+                    position = node.position.copy()
+                    segment = advance(position, cards.distinct_cards[card_id], to_strategy)
+                    self.turns_played += len(segment.coins)
+                    child = node.children[card_id] = _Node(position, segment, node, card_id)
+                node = child
+                path.append(node)
+                if child.segment.card in VICTORY_CARDS and node.position.is_winner():
+                    return FastForward(
+                        self.num_players,
+                        [n.segment for n in path],
+                        node.position.player_state.gross_expected_revenue(to_strategy))
+        finally:
+            self._touch(path)
+            self._evict()
+        raise InvalidStrategyError("The strategy does not buy all four victory cards.")
+
+    def simulate(
+        self,
+        strategy: Union[Strategy, StrategySpec],
+        log: str = "dataframe"
+    ) -> Union["pd.DataFrame", GameLog, SimulationSummary]:
+        """The same as `strategies.simulate` for a build order strategy, with the same `log` modes."""
+        if log not in ("dataframe", "array", "summary"):
+            raise ValueError(f"Unknown log mode: {log}")
+        if not isinstance(strategy, StrategySpec):
+            strategy = StrategySpec.from_strategy(strategy)
+        result = self.fast_forward(strategy)
+        if log == "summary":
+            return result.summary()
+        game_log = result.to_game_log()
+        return game_log if log == "array" else game_log.to_dataframe()
@@ -0,0 +1,60 @@
+"""
+Opt-in timing of the phases of a simulation.
+
+Pass a `Profiler` to `strategies.simulate` to find out where the time goes.
+The simulation marks the end of each phase with `Profiler.lap`,
+which charges the time since the previous mark to that phase.
+Without a profiler, each mark is a single `is not None` check.
+"""
+import time
+
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class Profiler:
+    """
+    Call counts and cumulative time for each phase of a simulation.
+
+    Phase names can be nested with semicolons, such as "my turn;income".
+    """
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self._last = time.perf_counter()
+
+    def start(self) -> None:
+        """Start timing the next phase from now."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the last lap to `phase`."""
+        now = time.perf_counter()
+        self.seconds[phase] += now - self._last
+        self.calls[phase] += 1
+        self._last = now
+
+    def summary(self) -> "pd.DataFrame":
+        """A table of the phases, slowest first."""
+        import pandas as pd
+
+        total = sum(self.seconds.values())
+        phases = sorted(self.seconds, key=self.seconds.get, reverse=True)
+        return pd.DataFrame({
+            "Phase": phases,
+            "Calls": [self.calls[p] for p in phases],
+            "Total (s)": [self.seconds[p] for p in phases],
+            "Per Call (us)": [self.seconds[p] / self.calls[p] * 1e6 for p in phases],
+            "Share": [self.seconds[p] / total if total else 0.0 for p in phases]
+        })
+
+    def write_collapsed(self, path: str, root: str = "simulate") -> None:
+        """
+        Save the phases in the collapsed stack format read by flamegraph tools,
+        one line per phase with its total time in microseconds.
+        """
+        with open(path, "w") as f:
+            for phase, seconds in sorted(self.seconds.items()):
+                f.write(f"{root};{phase} {round(seconds * 1e6)}\n")
@@ -0,0 +1,178 @@
+"""
+Find the fastest of many strategies under random dice without playing every one of them to the end.
+
+Every candidate still in the race plays another batch of Monte Carlo games each round,
+and keeps a running mean and confidence interval of its rounds to win.
+A candidate whose interval lies entirely above the best candidate's is dropped, since it is almost surely slower.
+The race ends when one candidate is left or every candidate left has played `max_games` games.
+
+The intervals are normal approximations, widened by the number of candidates still in the race
+and by the most rounds the race can run for, since the candidates are compared again after every batch.
+That way every interval at every round holds at once with the requested confidence,
+so every drop is right with at least that confidence.
+Every candidate plays at least one batch, even when there is only one.
+Games that never finish count as taking `monte_carlo.MAX_ROUNDS` rounds.
+"""
+import math
+import statistics
+
+import numpy as np
+
+from .dice import FAIR, DiceModel
+from .monte_carlo import MAX_ROUNDS, game_tables, play_batch
+from .strategies import Strategy, StrategySpec
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+@dataclass
+class Candidate:
+    """
+    A strategy's standing in a race.
+
+    games -- How many games it played.
+    low, high -- The confidence interval on its mean rounds to win when it was last played.
+    dropped_in -- The round of the race it was dropped in, or None if it made it to the end.
+    """
+    name: str
+    strategy: StrategySpec
+    games: int = 0
+    total: float = 0.0
+    total_squares: float = 0.0
+    low: float = -math.inf
+    high: float = math.inf
+    dropped_in: Optional[int] = None
+    rng: Optional[np.random.Generator] = field(default=None, repr=False)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.games
+
+    @property
+    def std(self) -> float:
+        if self.games < 2:
+            return math.inf
+        variance = (self.total_squares - self.total ** 2 / self.games) / (self.games - 1)
+        return math.sqrt(max(variance, 0.0))
+
+@dataclass
+class RaceResult:
+    """
+    The outcome of a race.
+
+    max_games -- The most games any one candidate could have played.
+    rounds -- How many rounds of batches the race ran for.
+    """
+    num_players: int
+    confidence: float
+    max_games: int
+    candidates: List[Candidate]
+    rounds: int
+
+    @property
+    def survivors(self) -> List[Candidate]:
+        return [c for c in self.candidates if c.dropped_in is None]
+
+    @property
+    def winner(self) -> Candidate:
+        """The candidate left with the lowest mean rounds to win."""
+        return min(self.survivors, key=lambda c: c.mean)
+
+    @property
+    def decided(self) -> bool:
+        """Whether the winner beat every other candidate with the requested confidence."""
+        return len(self.survivors) == 1
+
+    @property
+    def games(self) -> int:
+        return sum(c.games for c in self.candidates)
+
+    @property
+    def fixed_games(self) -> int:
+        """How many games it would have taken to play every candidate `max_games` times."""
+        return len(self.candidates) * self.max_games
+
+    def compute_saved(self) -> float:
+        """The fraction of `fixed_games` the race didn't need to play."""
+        return 1 - self.games / self.fixed_games
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame([
+            {
+                "Name": c.name,
+                "Games": c.games,
+                "Mean Rounds to Win": c.mean,
+                "Std. Rounds to Win": c.std,
+                "CI Low": c.low,
+                "CI High": c.high,
+                "Dropped In Round": c.dropped_in
+            }
+            for c in sorted(self.candidates, key=lambda c: c.mean)
+        ])
+
+def race(
+    strategies: Dict[str, Union[StrategySpec, Callable[[], Strategy]]],
+    num_players: int,
+    confidence: float = 0.95,
+    batch_size: int = 200,
+    max_games: int = 100_000,
+    seed: Optional[int] = None,
+    dice: DiceModel = FAIR
+) -> RaceResult:
+    """
+    Race build order strategies against each other with Monte Carlo games.
+
+    strategies -- Maps a name to a `StrategySpec` or a function returning a build order `Strategy`.
+    confidence -- How sure to be that every dropped candidate is slower than the winner.
+    batch_size -- How many games each candidate in the race plays per round.
+    max_games -- The most games to play any one candidate.
+    seed -- Each candidate gets its own independent stream of dice derived from this one.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+    if not (0 < confidence < 1):
+        raise ValueError("confidence must be between 0 and 1.")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+    if max_games <= 0:
+        raise ValueError("max_games must be positive.")
+
+    candidates = [
+        Candidate(name, s if isinstance(s, StrategySpec) else StrategySpec.from_strategy(s()))
+        for name, s in strategies.items()
+    ]
+    for candidate, candidate_seed in zip(candidates, np.random.SeedSequence(seed).spawn(len(candidates))):
+        candidate.rng = np.random.default_rng(candidate_seed)
+    tables = {c.name: game_tables(c.strategy.to_strategy(), num_players) for c in candidates}
+
+    # Split the chance of being wrong among every interval that can be compared in every round.
+    max_rounds = math.ceil(max_games / batch_size)
+    round_number = 0
+    alive = list(candidates)
+    while (len(alive) > 1 or round_number == 0) and any(c.games < max_games for c in alive):
+        round_number += 1
+        for c in alive:
+            num_games = min(batch_size, max_games - c.games)
+            if num_games == 0:
+                continue
+            rounds_to_win = play_batch(tables[c.name], num_players, num_games, c.rng, dice).astype(np.float64)
+            rounds_to_win[rounds_to_win == 0] = MAX_ROUNDS
+            c.games += num_games
+            c.total += rounds_to_win.sum()
+            c.total_squares += rounds_to_win @ rounds_to_win
+
+        z = statistics.NormalDist().inv_cdf(1 - (1 - confidence) / (2 * len(alive) * max_rounds))
+        for c in alive:
+            half_width = z * c.std / math.sqrt(c.games)
+            c.low, c.high = c.mean - half_width, c.mean + half_width
+        best_high = min(c.high for c in alive)
+        for c in alive:
+            if c.low > best_high:
+                c.dropped_in = round_number
+        alive = [c for c in alive if c.dropped_in is None]
+
+    return RaceResult(num_players, confidence, max_games, candidates, round_number)
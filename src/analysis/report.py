@@ -0,0 +1,202 @@
+"""
+Write the analysis tables to static HTML and Parquet files in bulk, outside Jupyter.
+
+The notebook colors each row by its card through pandas' `Styler`, which calls back into Python for every row.
+Here each row's card is looked up once through `cards.CARD_IDS_BY_NAME`,
+its style is picked out of a table indexed by card id, and each column is formatted in one pass,
+so even a table of 100,000 rows is written in about a second.
+"""
+import html
+import math
+import os
+
+import numpy as np
+
+from machi_koro import cards
+from machi_koro.cards import Color
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COLOR_MAP = {
+    Color.RED:    "hsl(0,   65%, 80%)",
+    Color.GREEN:  "hsl(105, 65%, 80%)",
+    Color.BLUE:   "hsl(210, 65%, 80%)",
+    Color.PURPLE: "hsl(256, 65%, 80%)",
+    Color.GOLD:   "hsl(50,  65%, 80%)"
+}
+
+# The attributes of a row for each card, indexed by card id, with an extra entry at -1 for rows without a card.
+_ROW_ATTRIBUTES = np.array(
+    [f' style="background: {COLOR_MAP[card.color]}"' for card in cards.distinct_cards] + [""],
+    dtype=object)
+
+CARD_ANALYSIS_FORMATS = {
+    "Expected coins per roll (2p)": "{:.2f}",
+    "Expected coins per roll (3p)": "{:.2f}",
+    "Expected coins per roll (4p)": "{:.2f}",
+    "Minimum rolls for payoff (4p)": "{:.0f}",
+    "Expected rolls for payoff (4p)": "{:.0f}"
+}
+
+TRACE_FORMATS = {
+    "Round": "{:.0f}",
+    "Turn": "{:.0f}",
+    "Coins": "{:.0f}",
+    "Expected Coins per Roll": "{:.2f}"
+}
+
+SUMMARY_FORMATS = {
+    "Max Exp. Coins/Roll": "{:.2f}",
+    "Mean Rounds to Win": "{:.2f}",
+    "Std. Rounds to Win": "{:.2f}",
+    "Unfinished Games": "{:.2%}"
+}
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+table {{ border-collapse: collapse; font-family: sans-serif; font-size: 14px; }}
+th, td {{ padding: 2px 8px; text-align: right; border-bottom: 1px solid #ddd; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{table}
+</body>
+</html>
+"""
+
+def card_ids(values: Iterable[Any]) -> np.ndarray:
+    """The id of each card in a column of cards, card names or ids, with -1 where there is no card."""
+    values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    lookup = {card: card.id for card in cards.distinct_cards}
+    lookup.update(cards.CARD_IDS_BY_NAME)
+    return np.array([lookup.get(value, -1) if value is not None else -1 for value in values], dtype=np.int64)
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def _cell(value: Any) -> str:
+    if isinstance(value, cards.Card):
+        return value.name
+    if isinstance(value, (set, frozenset)):
+        return " ".join(str(v) for v in sorted(value))
+    return str(value)
+
+def _format_column(values: Sequence[Any], spec: Optional[str], na_rep: str) -> List[str]:
+    """Format every cell in a column at once, escaped for HTML."""
+    if spec is None:
+        return [na_rep if _is_missing(v) else html.escape(_cell(v)) for v in values]
+    return [na_rep if _is_missing(v) else spec.format(v) for v in values]
+
+def to_html(
+    table: "pd.DataFrame",
+    card_column: Optional[str] = None,
+    formats: Optional[Dict[str, str]] = None,
+    na_rep: str = "-"
+) -> str:
+    """
+    Render a table as an HTML `<table>`.
+
+    card_column -- A column of cards, card names or ids to color each row by.
+    formats -- Format strings for some of the columns, such as `{"Coins": "{:.0f}"}`.
+    na_rep -- What to show for missing values.
+    """
+    formats = formats or {}
+    columns = [
+        _format_column(table[column].tolist(), formats.get(column), na_rep)
+        for column in table.columns
+    ]
+    if card_column is not None:
+        row_attributes = _ROW_ATTRIBUTES[card_ids(table[card_column].tolist())]
+    else:
+        row_attributes = [""] * len(table)
+
+    header = "".join(f"<th>{html.escape(str(column))}</th>" for column in table.columns)
+    body = [
+        f"<tr{attributes}><td>" + "</td><td>".join(cells) + "</td></tr>"
+        for attributes, *cells in zip(row_attributes, *columns)
+    ]
+    return f"<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n" + "\n".join(body) + "\n</tbody>\n</table>"
+
+def write_html(path: str, table: "pd.DataFrame", title: str, **kwargs) -> None:
+    """Write a table to a standalone HTML page. See `to_html` for the keyword arguments."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_PAGE.format(title=html.escape(title), table=to_html(table, **kwargs)))
+
+def write_parquet(path: str, table: "pd.DataFrame") -> None:
+    """
+    Write a table to Parquet, which needs `pyarrow`.
+    Cards are stored by name and sets of rolls as sorted lists.
+    """
+    table = table.copy()
+    for column in table.columns:
+        if table[column].dtype != object:
+            continue
+        values = table[column].tolist()
+        if any(isinstance(v, cards.Card) for v in values):
+            table[column] = [v.name if isinstance(v, cards.Card) else v for v in values]
+            table[column] = table[column].astype("category")
+        elif any(isinstance(v, (set, frozenset)) for v in values):
+            table[column] = [sorted(v) for v in values]
+    table.to_parquet(path, index=False)
+
+def card_table_html(card_analysis: "pd.DataFrame") -> str:
+    """The result of `cards.run` as HTML, like the notebook's `format_card_analysis`."""
+    return to_html(card_analysis, card_column="Card", formats=CARD_ANALYSIS_FORMATS)
+
+def trace_html(trace: "pd.DataFrame") -> str:
+    """The turn-by-turn log of `strategies.simulate` as HTML, like the notebook's `format_strategy_simulation`."""
+    return to_html(trace, card_column="Bought Card", formats=TRACE_FORMATS, na_rep="")
+
+def summary_html(summary: "pd.DataFrame") -> str:
+    """A strategy summary such as `strategies.tournament` returns as HTML."""
+    return to_html(summary, formats=SUMMARY_FORMATS)
+
+def export(
+    directory: str,
+    num_players: int = 4,
+    num_games: int = 0,
+    seed: Optional[int] = None,
+    parquet: bool = True,
+    max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Write every table of the notebook to `directory`: the card analysis with one and two dice,
+    a tournament of the named strategies, and the trace of each named strategy with `num_players` players.
+
+    num_games -- Monte Carlo games for each tournament entry, or 0 for only the expected value model.
+    parquet -- Whether to also write each table to Parquet.
+    Returns the paths of the files written.
+    """
+    from . import cards as card_analysis, strategies
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+
+    def write(name: str, table: "pd.DataFrame", title: str, **kwargs) -> None:
+        path = os.path.join(directory, name)
+        write_html(path + ".html", table, title, **kwargs)
+        written.append(path + ".html")
+        if parquet:
+            write_parquet(path + ".parquet", table)
+            written.append(path + ".parquet")
+
+    for two_dice in (False, True):
+        write(f"cards_{'two_dice' if two_dice else 'one_die'}", card_analysis.run(two_dice),
+              f"Cards with {'two dice' if two_dice else 'one die'}",
+              card_column="Card", formats=CARD_ANALYSIS_FORMATS)
+    write("strategies", strategies.tournament(strategies.NAMED_STRATEGIES, num_games=num_games, seed=seed, max_workers=max_workers),
+          "Strategies", formats=SUMMARY_FORMATS)
+    for name, strategy in strategies.NAMED_STRATEGIES.items():
+        write(f"trace_{name}", strategies.simulate(strategy(), num_players),
+              f"{name} with {num_players} players",
+              card_column="Bought Card", formats=TRACE_FORMATS, na_rep="")
+    return written
@@ -0,0 +1,216 @@
+"""
+Save the results of `strategies.simulate` and `cards.run` on disk so they don't have to be recomputed.
+
+Each result is stored in a file named by a hash of everything it depends on:
+the build order and dice policy, the number of players, the dice,
+and a fingerprint of each card involved, which hashes the source of `machi_koro.cards` and `analysis.cards`.
+A card's revenue depends on helpers and models outside its own class, so editing either module misses every entry.
+Nothing is ever looked up by a stale key, so old entries are simply left to be evicted.
+
+Results are saved as zlib-compressed `.npy` arrays.
+An entry that can't be read back, such as one cut short by a full disk, is deleted and recomputed.
+When the cache grows past its size limit, the least recently used entries are deleted.
+"""
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import zlib
+
+import numpy as np
+
+from . import cards as card_analysis, strategies
+from .data_files import project_root
+from .dice import FAIR, DiceModel
+from .strategies import GameLog, SimulationSummary, Strategy, StrategySpec
+from machi_koro import cards
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bump this when a change to the analysis code changes its results, to miss every entry saved before.
+CACHE_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(project_root, '.cache', 'results')
+
+# 64 MiB holds many thousands of simulations.
+DEFAULT_MAX_BYTES = 64 << 20
+
+@functools.lru_cache(maxsize=None)
+def _source_fingerprint(obj) -> str:
+    return hashlib.sha256(inspect.getsource(obj).encode()).hexdigest()
+
+def card_fingerprint(card: cards.Card) -> str:
+    """A hash of a card's definition, which changes whenever `machi_koro.cards` or `analysis.cards` is edited."""
+    return hashlib.sha256((_source_fingerprint(cards) + _source_fingerprint(card_analysis) + card.name).encode()).hexdigest()
+
+def _dice_description(dice: DiceModel) -> Dict[str, Any]:
+    return {"first": list(dice.first), "second": list(dice.second)}
+
+def _hash(description: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+def cache_key(kind: str, dice: DiceModel, **description: Any) -> str:
+    """
+    A cache key for a result of some `kind`, computed with `dice`,
+    that depends on everything in `description`, which must be JSON serializable.
+    """
+    return _hash({"kind": kind, "version": CACHE_VERSION, "dice": _dice_description(dice), **description})
+
+def simulation_key(strategy: StrategySpec, num_players: int, dice: DiceModel = FAIR) -> str:
+    """The cache key for simulating a strategy."""
+    involved = set(strategies.starting_hand()) | {cards.distinct_cards[i] for i in strategy.build_order}
+    return cache_key(
+        "simulate",
+        dice,
+        build_order=[cards.distinct_cards[i].name for i in strategy.build_order],
+        roll_two=[strategy.roll_two, _source_fingerprint(strategies.ROLL_TWO_POLICIES[strategy.roll_two])],
+        num_players=num_players,
+        cards={card.name: card_fingerprint(card) for card in involved})
+
+def card_analysis_key(two_dice: bool, dice: DiceModel = FAIR) -> str:
+    """The cache key for `cards.run`, which involves every card."""
+    return cache_key(
+        "cards.run",
+        dice,
+        two_dice=two_dice,
+        cards={card.name: card_fingerprint(card) for card in cards.distinct_cards})
+
+class ResultCache:
+    """
+    A directory of arrays keyed by hash, bounded in total size,
+    evicting the least recently used entries when it is full.
+    """
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.bin')
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            array = np.load(io.BytesIO(zlib.decompress(data)), allow_pickle=False)
+        except (zlib.error, EOFError, OSError, ValueError):
+            # Treat a truncated or corrupt entry as missing, and delete it so it gets saved again.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Reading doesn't reliably update the access time, so mark the entry as used by its modification time.
+        os.utime(path)
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so a reader never sees half an entry.
+        path = self._path(key)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(zlib.compress(buffer.getvalue()))
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def _entries(self) -> Iterable[os.DirEntry]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.bin')]
+
+    def size(self) -> int:
+        """The total size of the entries in bytes."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits in `max_bytes`."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            os.remove(entry.path)
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+# Shared by every caller that doesn't pass its own cache.
+DEFAULT_CACHE = ResultCache()
+
+def simulate(
+    strategy: Strategy,
+    num_players: int,
+    log: str = "dataframe",
+    dice: DiceModel = FAIR,
+    cache: ResultCache = DEFAULT_CACHE
+) -> Union["pd.DataFrame", GameLog, SimulationSummary]:
+    """
+    The same as `strategies.simulate`, but saved to `cache` for next time.
+
+    Strategies that can't be described by a `StrategySpec` are simulated without the cache.
+    """
+    if log not in ("dataframe", "array", "summary"):
+        raise ValueError(f"Unknown log mode: {log}")
+    try:
+        spec = StrategySpec.from_strategy(strategy)
+    except TypeError:
+        return strategies.simulate(strategy, num_players, log=log, dice=dice)
+
+    key = simulation_key(spec, num_players, dice)
+    rows = cache.get(key)
+    if rows is None:
+        rows = strategies.simulate(spec.to_strategy(), num_players, log="array", dice=dice).rows
+        cache.put(key, rows)
+
+    game_log = GameLog.from_rows(rows)
+    if log == "summary":
+        return SimulationSummary(
+            rounds_to_win=int(rows["Round"][-1]),
+            max_expected_coins_per_roll=float(rows["Expected Coins per Roll"].max()),
+            scores_on=strategies.aggregate_scores_on(game_log))
+    elif log == "array":
+        return game_log
+    else:
+        return game_log.to_dataframe()
+
+def run(two_dice: bool, dice: DiceModel = FAIR, cache: ResultCache = DEFAULT_CACHE) -> "pd.DataFrame":
+    """The same as `cards.run`, but saved to `cache` for next time."""
+    import pandas as pd
+
+    key = card_analysis_key(two_dice, dice)
+    values = cache.get(key)
+    if values is not None:
+        columns = list(values.dtype.names)
+        return pd.DataFrame({
+            "Card": [card.name for card in cards.distinct_cards],
+            **{column: values[column] for column in columns}
+        })
+
+    result = card_analysis.run(two_dice, dice)
+    numbers = result.drop(columns="Card")
+    values = np.zeros(len(result), dtype=[(str(column), np.float64) for column in numbers.columns])
+    for column in numbers.columns:
+        values[column] = numbers[column].to_numpy(dtype=np.float64)
+    cache.put(key, values)
+    return result
@@ -0,0 +1,114 @@
+"""
+Statistics on recorded dice rolls, computed in one pass over a log of any size.
+
+A log has a column for each die and a row for each roll of all of them.
+Only the counts of each face and of each sum are kept, so memory use doesn't grow with the log.
+"""
+import numpy as np
+
+from .data_files import CHUNK_SIZE, iter_chunks
+from .dice import FACES
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def fair_sum_distribution(num_dice: int) -> np.ndarray:
+    """The probability of each sum of `num_dice` fair dice, indexed by the sum."""
+    die = np.array([0.0] + [1 / FACES] * FACES)
+    distribution = np.array([1.0])
+    for _ in range(num_dice):
+        distribution = np.convolve(distribution, die)
+    return distribution
+
+@dataclass
+class RollStatistics:
+    """
+    Running counts of the rolls in a dice log.
+
+    dice -- The name of each die.
+    face_counts -- How many times each die landed on each face, indexed by [die, face].
+    sum_counts -- How many rolls added up to each sum, indexed by the sum.
+    """
+    dice: List[str]
+    face_counts: np.ndarray
+    sum_counts: np.ndarray
+
+    def __init__(self, dice: List[str]):
+        self.dice = list(dice)
+        self.face_counts = np.zeros((len(self.dice), FACES + 1), dtype=np.int64)
+        self.sum_counts = np.zeros(FACES * len(self.dice) + 1, dtype=np.int64)
+
+    @property
+    def num_rolls(self) -> int:
+        return int(self.sum_counts.sum())
+
+    def update(self, chunk: Union["pd.DataFrame", np.ndarray]) -> None:
+        """Count the rolls in a chunk of the log, given as a `pd.DataFrame` or a structured array."""
+        total = np.zeros(len(chunk), dtype=np.int64)
+        for i, die in enumerate(self.dice):
+            faces = np.asarray(chunk[die], dtype=np.int64)
+            if len(faces) > 0 and (faces.min() < 1 or faces.max() > FACES):
+                raise ValueError(f"The {die} die has a roll outside 1 through {FACES}.")
+            self.face_counts[i] += np.bincount(faces, minlength=FACES + 1)
+            total += faces
+        self.sum_counts += np.bincount(total, minlength=len(self.sum_counts))
+
+    def frequencies(self) -> "pd.DataFrame":
+        """How many times each die landed on each face, with a row for each face."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {die: self.face_counts[i, 1:] for i, die in enumerate(self.dice)},
+            index=pd.RangeIndex(1, FACES + 1, name="Face"))
+
+    def sum_histogram(self) -> "pd.Series":
+        """How many rolls added up to each possible sum."""
+        import pandas as pd
+
+        sums = np.arange(len(self.dice), len(self.sum_counts))
+        return pd.Series(self.sum_counts[sums], index=pd.Index(sums, name="Sum"), name="Rolls")
+
+    def chi_square(self, die: str) -> Tuple[float, float]:
+        """The chi-square statistic and p-value for the hypothesis that a die is fair."""
+        import scipy.stats
+
+        result = scipy.stats.chisquare(self.face_counts[self.dice.index(die), 1:])
+        return float(result.statistic), float(result.pvalue)
+
+    def sum_chi_square(self) -> Tuple[float, float]:
+        """The chi-square statistic and p-value for the hypothesis that the sums come from fair dice."""
+        import scipy.stats
+
+        sums = np.arange(len(self.dice), len(self.sum_counts))
+        expected = fair_sum_distribution(len(self.dice))[sums] * self.num_rolls
+        result = scipy.stats.chisquare(self.sum_counts[sums], expected)
+        return float(result.statistic), float(result.pvalue)
+
+    def fairness(self) -> "pd.DataFrame":
+        """A chi-square test of fairness for each die and for the sum of all of them."""
+        import pandas as pd
+
+        tests = [self.chi_square(die) for die in self.dice] + [self.sum_chi_square()]
+        return pd.DataFrame({
+            "Test": self.dice + ["Sum"],
+            "Chi-Square": [statistic for statistic, _ in tests],
+            "p-value": [p for _, p in tests]
+        })
+
+def summarize(filename: str, chunksize: int = CHUNK_SIZE) -> RollStatistics:
+    """
+    Count the rolls in a dice log in the data directory in one pass.
+
+    filename -- A TSV file, or a `.npy` file made from one with `data_files.tsv_to_npy`.
+    """
+    statistics = None
+    for chunk in iter_chunks(filename, chunksize):
+        if statistics is None:
+            dice = chunk.dtype.names if isinstance(chunk, np.ndarray) else chunk.columns
+            statistics = RollStatistics([str(die) for die in dice])
+        statistics.update(chunk)
+    if statistics is None:
+        raise ValueError(f"{filename} has no rolls.")
+    return statistics
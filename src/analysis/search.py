@@ -0,0 +1,313 @@
+"""
+Search for the build order that wins the fastest under the expected value model of `strategies.simulate`.
+
+The search runs one round at a time over the states a player can be in at the start of their turn,
+keyed by the canonical hand: the number of each card held, victory cards included,
+and the card the player is saving up for, if any.
+A build order buys each card as soon as it can be afforded, so the search plays by the same rule:
+right after a purchase, a state either buys any card it can afford or starts saving for one it can't,
+and a state saving for a card buys it on the first turn it can.
+Two ways of reaching the same state in the same round are merged into whichever has more coins,
+since following the same build order from the richer one wins no later.
+The first round in which some state owns every victory card is the fewest rounds it takes to win.
+
+Every state in a round is advanced together with NumPy arrays.
+Coins are added up in floating point the same way `strategies.simulate` adds them up,
+from the same expected incomes in the same order, so a build order wins in the same round in both.
+Adding the same income to more coins never gives fewer, so merging states is still safe.
+"""
+import time
+
+import numpy as np
+
+from .cards import (
+    COLORS_ACTIVATED_ON_MY_TURN,
+    COLORS_ACTIVATED_ON_OTHER_TURN,
+    activation_table,
+    color_mask,
+    revenue_kernel
+)
+from .dice import FAIR
+from .strategies import MAX_ROUNDS, VICTORY_CARDS, PlayerState, StrategySpec, hand_revenues
+from dataclasses import dataclass
+from machi_koro import cards
+from machi_koro.cards import MAX_COPIES, supply_limits
+from typing import Callable, Dict, List, Optional
+
+# The number of ways to roll each number from 0 through 12 with fair dice, out of 36.
+_ONE_DIE_WAYS = 6 * FAIR.ways(False)
+_TWO_DICE_WAYS = FAIR.ways(True)
+
+_TRAIN_STATION = cards.card_id(cards.TrainStation())
+
+# The dice policies in `strategies.ROLL_TWO_POLICIES`, evaluated for many hands at once.
+_ROLL_TWO_POLICIES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "never": lambda counts: np.zeros(len(counts), dtype=bool),
+    "always_after_train_station": lambda counts: counts[:, _TRAIN_STATION] > 0
+}
+
+# Hands are packed into one integer with this many bits per card,
+# followed by one more than the id of the card being saved for, or 0 if there is none.
+_BITS_PER_CARD = 3
+_SAVING_SHIFT = cards.NUM_DISTINCT_CARDS * _BITS_PER_CARD
+_HAND_MASK = (1 << _SAVING_SHIFT) - 1
+
+@dataclass
+class SearchResult:
+    """
+    The best build order found and how much work it took to find it.
+
+    rounds_to_win -- The rounds it takes `strategies.simulate` to win with `strategy`.
+    nodes_explored -- How many states were expanded.
+    cache_lookups -- How many successor states were generated and looked up among the states for the next round.
+    cache_hits -- How many of those found the same hand already there and were merged into it.
+    pruned_by_bound -- How many states were dropped because they couldn't win within `upper_bound` rounds.
+    pruned_by_dominance -- How many states were dropped because a state with one more card had more coins.
+    """
+    strategy: StrategySpec
+    rounds_to_win: int
+    nodes_explored: int
+    cache_lookups: int
+    cache_hits: int
+    pruned_by_bound: int
+    pruned_by_dominance: int
+    seconds: float
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_hits / self.cache_lookups if self.cache_lookups else 0.0
+
+class Incomes:
+    """
+    Expected incomes for many hands at once, in 36ths of a coin.
+
+    roll_two -- The name of the dice policy in `strategies.ROLL_TWO_POLICIES` that calling an `Incomes` plays with.
+    """
+    CHUNK_SIZE = 1 << 18
+
+    def __init__(self, num_players: int, roll_two: str = "always_after_train_station"):
+        self.num_players = num_players
+        self.roll_two_name = roll_two
+        kernel = revenue_kernel(num_players)
+        # Small whole numbers multiply exactly as floats, and NumPy multiplies small float matrices much faster.
+        self.base = kernel.base.astype(np.float64)
+        self.linear = np.ascontiguousarray(kernel.linear.T, dtype=np.float64)
+        self.presence = np.ascontiguousarray(kernel.presence.T, dtype=np.float64)
+        self.roll_two = _ROLL_TWO_POLICIES[roll_two]
+        # The ways out of 36 that each card activates on your turn with one die, with two dice,
+        # and on another player's turn, counting only the turns it activates on.
+        # Assume that other players always roll one die.
+        activations = activation_table()
+        my_turn = color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN))
+        other_turn = color_mask(tuple(COLORS_ACTIVATED_ON_OTHER_TURN))
+        self.ways = np.stack([
+            (_ONE_DIE_WAYS @ activations) * my_turn,
+            (_TWO_DICE_WAYS @ activations) * my_turn,
+            (_ONE_DIE_WAYS @ activations) * other_turn
+        ], axis=1).astype(np.float64)
+
+    def by_dice(self, counts: np.ndarray) -> np.ndarray:
+        """The income on your turn with one die, with two dice, and on another player's turn, as the columns of an array."""
+        counts = counts.astype(np.float64)
+        revenue = counts * (self.base + counts @ self.linear + (counts > 0) @ self.presence)
+        return np.rint(revenue @ self.ways).astype(np.int64)
+
+    def __call__(self, counts: np.ndarray):
+        """The income on your turn with the dice policy, and on another player's turn."""
+        my_turn = np.empty(len(counts), dtype=np.int64)
+        other_turn = np.empty(len(counts), dtype=np.int64)
+        # Work through big batches of hands a piece at a time to limit memory use.
+        for start in range(0, len(counts), self.CHUNK_SIZE):
+            chunk = counts[start:start + self.CHUNK_SIZE]
+            one_die, two_dice, other = self.by_dice(chunk).T
+            my_turn[start:start + len(chunk)] = np.where(self.roll_two(chunk), two_dice, one_die)
+            other_turn[start:start + len(chunk)] = other
+        return my_turn, other_turn
+
+class _Revenues:
+    """
+    The expected incomes `strategies.simulate` adds to a player's coins, as the very same floating point numbers.
+
+    Each hand's incomes are only worked out the first time it comes up.
+    """
+    def __init__(self, num_players: int, roll_two: str):
+        self.kernel = revenue_kernel(num_players)
+        self.roll_two = _ROLL_TWO_POLICIES[roll_two]
+        # The packed hands seen so far in sorted order,
+        # with their income on your turn with the dice policy and on another player's turn.
+        self.hands = np.zeros(0, dtype=np.int64)
+        self.my_turn = np.zeros(0)
+        self.other_turn = np.zeros(0)
+
+    def __call__(self, hands: np.ndarray, counts: np.ndarray):
+        """The income on your turn with the dice policy, and on another player's turn, for packed hands with these counts."""
+        unique, first = np.unique(hands, return_index=True)
+        new = ~np.isin(unique, self.hands, assume_unique=True)
+        if new.any():
+            new_counts = counts[first[new]].astype(np.int64)
+            kernel = self.kernel
+            revenue = hand_revenues(new_counts, kernel.base + new_counts @ kernel.linear.T + (new_counts > 0) @ kernel.presence.T)
+            order = np.argsort(np.concatenate([self.hands, unique[new]]))
+            self.hands = np.concatenate([self.hands, unique[new]])[order]
+            self.my_turn = np.concatenate([self.my_turn, np.where(self.roll_two(new_counts), revenue[:, 1], revenue[:, 0])])[order]
+            self.other_turn = np.concatenate([self.other_turn, revenue[:, 2]])[order]
+        index = np.searchsorted(self.hands, hands)
+        return self.my_turn[index], self.other_turn[index]
+
+def optimal_build_order(
+    num_players: int,
+    roll_two: str = "always_after_train_station",
+    max_copies: int = MAX_COPIES,
+    upper_bound: Optional[int] = None
+) -> SearchResult:
+    """
+    Find the build order that wins in the fewest rounds under the expected value model.
+
+    roll_two -- The name of the dice policy in `strategies.ROLL_TWO_POLICIES` to play with.
+    max_copies -- The most copies of any one establishment to consider buying.
+    upper_bound -- Drop states that can't win within this many rounds, such as the result of a known strategy.
+    """
+    if not (2 <= num_players <= 4):
+        raise ValueError()
+    if not (1 <= max_copies < 1 << _BITS_PER_CARD):
+        raise ValueError(f"max_copies must be between 1 and {(1 << _BITS_PER_CARD) - 1}.")
+
+    start = time.perf_counter()
+    incomes = Incomes(num_players, roll_two)
+    revenues = _Revenues(num_players, roll_two)
+    victory_ids = np.array([cards.card_id(c) for c in VICTORY_CARDS])
+    cost = np.array([c.cost for c in cards.distinct_cards])
+    shifts = np.arange(cards.NUM_DISTINCT_CARDS, dtype=np.int64) * _BITS_PER_CARD
+    victory_mask = int(sum(1 << int(shifts[i]) for i in victory_ids))
+    limits = supply_limits(max_copies)
+    # Cards that can't make money with the dice that get rolled are only worth buying if they are needed to win.
+    biggest_hand = np.tile(limits, (cards.NUM_DISTINCT_CARDS + 1, 1)).astype(np.int8)
+    biggest_hand[np.arange(cards.NUM_DISTINCT_CARDS), np.arange(cards.NUM_DISTINCT_CARDS)] = 0
+    my_turn, other_turn = incomes(biggest_hand)
+    candidates = [
+        i for i in range(cards.NUM_DISTINCT_CARDS)
+        if i in victory_ids or my_turn[i] != my_turn[-1] or other_turn[i] != other_turn[-1]
+    ]
+
+    nodes_explored = cache_lookups = cache_hits = pruned_by_bound = pruned_by_dominance = 0
+    last_round = upper_bound if upper_bound is not None else MAX_ROUNDS
+
+    player_state = PlayerState(num_players)
+    counts = player_state.hand.counts[np.newaxis, :].astype(np.int8)
+    keys = _pack(counts, shifts)
+    coins = np.array([player_state.coins], dtype=np.float64)
+    # For each round, the index of each state's previous state and the card it bought to get there.
+    history = []
+    for round_number in range(1, last_round + 1):
+        nodes_explored += len(counts)
+        hands = keys & _HAND_MASK
+        my_turn, _ = revenues(hands, counts)
+        coins = coins + my_turn
+
+        # A state saving for a card buys it as soon as it can, and keeps saving until then.
+        saving_for = (keys >> _SAVING_SHIFT) - 1
+        saving = np.flatnonzero(saving_for >= 0).astype(np.int32)
+        target = saving_for[saving]
+        affordable = coins[saving] >= cost[target]
+        buyers, savers = saving[affordable], saving[~affordable]
+        next_keys = [hands[buyers] + (1 << shifts[target[affordable]]), keys[savers]]
+        next_coins = [coins[buyers] - cost[target[affordable]], coins[savers]]
+        parents = [buyers, savers]
+        bought = [target[affordable].astype(np.int8), np.full(len(savers), -1, dtype=np.int8)]
+
+        # Right after a purchase, pick the next card: buy it now if possible, or start saving for it.
+        choosing = np.flatnonzero(saving_for < 0).astype(np.int32)
+        for i in candidates:
+            can_hold = choosing[counts[choosing, i] < limits[i]]
+            affordable = coins[can_hold] >= cost[i]
+            buyers, savers = can_hold[affordable], can_hold[~affordable]
+            next_keys += [hands[buyers] + (1 << int(shifts[i])), hands[savers] + ((i + 1) << _SAVING_SHIFT)]
+            next_coins += [coins[buyers] - cost[i], coins[savers]]
+            parents += [buyers, savers]
+            bought += [np.full(len(buyers), i, dtype=np.int8), np.full(len(savers), -1, dtype=np.int8)]
+        keys, coins = np.concatenate(next_keys), np.concatenate(next_coins)
+        parent, card = np.concatenate(parents), np.concatenate(bought)
+        del next_keys, next_coins, parents, bought
+
+        won = np.flatnonzero((keys & victory_mask) == victory_mask)
+        if len(won) > 0:
+            history.append((parent, card))
+            return _result(history, won, roll_two, round_number, nodes_explored, cache_lookups,
+                           cache_hits, pruned_by_bound, pruned_by_dominance, start)
+
+        # Keep the richest way of reaching each hand.
+        cache_lookups += len(keys)
+        order = np.lexsort((-coins, keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = keys[order[1:]] != keys[order[:-1]]
+        keep = order[first]
+        del order, first
+        cache_hits += len(keys) - len(keep)
+        keys, coins, parent, card = keys[keep], coins[keep], parent[keep], card[keep]
+        counts = counts[parent]
+        buyers = np.flatnonzero(card >= 0)
+        counts[buyers, card[buyers]] += 1
+
+        _, other_turn = revenues(keys & _HAND_MASK, counts)
+        # `strategies.simulate` adds each other player's turn to the coins separately.
+        for _ in range(num_players - 1):
+            coins = coins + other_turn
+
+        # A hand with an extra card, saving for the same card, and with more coins does at least as well,
+        # as long as the extra card isn't the Train Station, which changes how many dice get rolled.
+        # Equal incomes from different hands can differ in the last bits of their floating point sums,
+        # so the coins have to differ by more than that: every amount of coins is within a hair of a multiple of 1/36.
+        dominated = np.zeros(len(keys), dtype=bool)
+        for i in candidates:
+            if i == _TRAIN_STATION:
+                continue
+            bigger = keys + (1 << int(shifts[i]))
+            index = np.minimum(np.searchsorted(keys, bigger), len(keys) - 1)
+            dominated |= (counts[:, i] < limits[i]) & (keys[index] == bigger) & (coins[index] > coins + 1 / 72)
+        pruned_by_dominance += int(dominated.sum())
+
+        # Every missing victory card takes a turn of its own to buy.
+        missing = (counts[:, victory_ids] == 0).sum(axis=1)
+        out_of_time = round_number + missing > last_round
+        pruned_by_bound += int((out_of_time & ~dominated).sum())
+
+        keep = ~dominated & ~out_of_time
+        keys, counts, coins = keys[keep], counts[keep], coins[keep]
+        history.append((parent[keep], card[keep]))
+
+    raise ValueError(f"No build order wins within {last_round} rounds.")
+
+def _pack(counts: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """Pack each hand into one integer so hands can be sorted and compared quickly."""
+    return (counts.astype(np.int64) << shifts).sum(axis=1)
+
+def _build_order(history: List, index: int) -> List[int]:
+    """The cards bought on the way to the state at `index` in the last round of `history`."""
+    build_order: List[int] = []
+    for parent, card in reversed(history):
+        if card[index] >= 0:
+            build_order.append(int(card[index]))
+        index = parent[index]
+    return build_order[::-1]
+
+def _result(
+    history: List,
+    won: np.ndarray,
+    roll_two: str,
+    rounds_to_win: int,
+    nodes_explored: int,
+    cache_lookups: int,
+    cache_hits: int,
+    pruned_by_bound: int,
+    pruned_by_dominance: int,
+    start: float
+) -> SearchResult:
+    return SearchResult(
+        strategy=StrategySpec(tuple(_build_order(history, int(won[0]))), roll_two),
+        rounds_to_win=rounds_to_win,
+        nodes_explored=nodes_explored,
+        cache_lookups=cache_lookups,
+        cache_hits=cache_hits,
+        pruned_by_bound=pruned_by_bound,
+        pruned_by_dominance=pruned_by_dominance,
+        seconds=time.perf_counter() - start)
@@ -1,26 +1,57 @@
+import copy
 import math
+import os
 
-import pandas as pd
+from collections import OrderedDict
+import numpy as np
 
-from .cards import expected_value_my_turn, expected_value_other_turn
+from .cards import (
+    COLORS_ACTIVATED_ON_MY_TURN,
+    COLORS_ACTIVATED_ON_OTHER_TURN,
+    activation_probabilities,
+    activation_table,
+    color_mask,
+    expected_value_my_turn,
+    expected_value_other_turn,
+    revenue_kernel
+)
+from .dice import FAIR, DiceModel
+from .profiling import Profiler
 from dataclasses import dataclass
 from machi_koro import cards
-from machi_koro.cards import Card, Color
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from machi_koro.cards import Card, Color, Hand
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-def expected_revenue_my_turn(hand: List[Card], two_dice: bool, num_players: int) -> float:
+if TYPE_CHECKING:
+    import pandas as pd
+
+def _expected_revenue(hand: Hand, two_dice: bool, num_players: int, colors: List[Color], dice: DiceModel) -> float:
+    # Weight each card's revenue by how many we hold and how likely it is to activate.
+    weights = hand.counts * activation_probabilities(two_dice, dice) * color_mask(tuple(colors))
+    return float(weights @ revenue_kernel(num_players).revenue(hand.counts))
+
+def expected_revenue_my_turn(hand: Union[List[Card], Hand], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a hand will yield on your turn."""
-    return sum(expected_value_my_turn(c, hand, two_dice, num_players) for c in hand)
+    if isinstance(hand, Hand):
+        return _expected_revenue(hand, two_dice, num_players, COLORS_ACTIVATED_ON_MY_TURN, dice)
+    return sum(expected_value_my_turn(c, hand, two_dice, num_players, dice) for c in hand)
 
-def expected_revenue_other_turn(hand: List[Card], two_dice: bool, num_players: int) -> float:
+def expected_revenue_other_turn(hand: Union[List[Card], Hand], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a hand will yield on another player's turn."""
-    return sum(expected_value_other_turn(c, hand, two_dice, num_players) for c in hand)
+    if isinstance(hand, Hand):
+        return _expected_revenue(hand, two_dice, num_players, COLORS_ACTIVATED_ON_OTHER_TURN, dice)
+    return sum(expected_value_other_turn(c, hand, two_dice, num_players, dice) for c in hand)
+
+def income_by_roll(hand: Hand, num_players: int, colors: List[Color]) -> np.ndarray:
+    """The coins a hand yields for each roll from 0 through 12, counting only cards of the given colors."""
+    weights = activation_table() * (hand.counts * color_mask(tuple(colors)))
+    return weights @ revenue_kernel(num_players).revenue(hand.counts)
 
-def gross_expected_revenue(hand: List[Card], two_dice: bool, num_players: int) -> float:
+def gross_expected_revenue(hand: Union[List[Card], Hand], two_dice: bool, num_players: int, dice: DiceModel = FAIR) -> float:
     """The average revenue a hand will yield on a turn."""
-    my_turn = expected_revenue_my_turn(hand, two_dice, num_players)
+    my_turn = expected_revenue_my_turn(hand, two_dice, num_players, dice)
     # Assume the other players always roll one die.
-    other_turn = expected_revenue_other_turn(hand, False, num_players)
+    other_turn = expected_revenue_other_turn(hand, False, num_players, dice)
     return (my_turn + (num_players - 1) * other_turn) / num_players
 
 def _is_victory_card(card):
@@ -33,6 +64,8 @@ class Strategy:
     # While not technically needed (we *could* just math out every round number for the cards we want),
     # pass in the player state to make implementing a strategy easier.
     Buy = Callable[["PlayerState", int], Optional[Card]]
+    # A dice policy is asked again on every turn, since it may look at the coins or anything else.
+    # Policies that only look at the hand can be marked with `hand_only` to be asked once per hand instead.
     RollTwo = Callable[["PlayerState"], bool]
 
     def __init__(self, buy: Buy, roll_two: RollTwo):
@@ -47,61 +80,316 @@ class InvalidStrategyError(Exception):
     def __init__(self, message):
         self.message = message
 
+@dataclass(frozen=True)
+class HandRevenue:
+    """The average revenue a hand will yield on each kind of turn."""
+    my_turn_one_die: float
+    my_turn_two_dice: float
+    # Assume that other players always roll one die.
+    other_turn: float
+
+    def my_turn(self, two_dice: bool) -> float:
+        return self.my_turn_two_dice if two_dice else self.my_turn_one_die
+
+    def gross(self, two_dice: bool, num_players: int) -> float:
+        """The same as `gross_expected_revenue`."""
+        return (self.my_turn(two_dice) + (num_players - 1) * self.other_turn) / num_players
+
+def hand_revenues(counts: np.ndarray, revenue: np.ndarray, dice: DiceModel = FAIR) -> np.ndarray:
+    """
+    The average revenue of many hands on each kind of turn,
+    with a row for each hand and the fields of `HandRevenue` as the columns.
+
+    counts -- The count of each card, with a row for each hand.
+    revenue -- The revenue of each card for each hand, as from `RevenueKernel.revenue`.
+    """
+    # Weight each card's revenue by how many we hold and how likely it is to activate,
+    # the same way `_expected_revenue` does.
+    my_turn = counts * color_mask(tuple(COLORS_ACTIVATED_ON_MY_TURN))
+    other_turn = counts * color_mask(tuple(COLORS_ACTIVATED_ON_OTHER_TURN))
+    one_die = my_turn * activation_probabilities(False, dice)
+    two_dice = my_turn * activation_probabilities(True, dice)
+    other = other_turn * activation_probabilities(False, dice)
+    # Take a separate dot product for each hand, so a hand's revenue is added up the same way
+    # whether it is worked out on its own or with many others.
+    return np.array([
+        (a @ r, b @ r, c @ r) for a, b, c, r in zip(one_die, two_dice, other, revenue.astype(np.float64))
+    ], dtype=np.float64).reshape(len(counts), 3)
+
+class HandRevenueCache:
+    """
+    A bounded cache of `HandRevenue` keyed on the canonical form of a hand and the dice,
+    evicting the least recently used hand when it is full.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[bytes, int, DiceModel], HandRevenue]" = OrderedDict()
+
+    def get(self, hand: Hand, num_players: int, revenue: np.ndarray, dice: DiceModel = FAIR) -> HandRevenue:
+        """
+        Look up the revenue for a hand.
+
+        revenue -- The revenue of each card for this hand, as from `RevenueKernel.revenue`.
+            It is only used when the hand isn't in the cache.
+        """
+        key = (hand.counts.tobytes(), num_players, dice)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = HandRevenue(*hand_revenues(hand.counts[np.newaxis, :], revenue[np.newaxis, :], dice)[0].tolist())
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Shared by every `PlayerState`, so hands that come up again in later simulations are already known.
+REVENUE_CACHE = HandRevenueCache(maxsize=1 << 16)
+
+def starting_hand() -> Hand:
+    """The cards each player gets for the start of the game."""
+    return Hand([cards.WheatField(), cards.Bakery()])
+
 @dataclass
 class PlayerState:
-    hand: List[Card]
+    hand: Hand
     coins: float
     num_players: int
+    dice: DiceModel
 
-    def __init__(self, num_players: int):
-        # This is what each player gets for the start of the game.
-        self.hand = [cards.WheatField(), cards.Bakery()]
+    def __init__(self, num_players: int, dice: DiceModel = FAIR):
+        self.hand = starting_hand()
         self.coins = 3
         self.num_players = num_players
+        self.dice = dice
+        # The revenue of each card and the dice to roll for a `hand_only` policy are kept up to date as cards are bought.
+        # They are tagged with the hand they were computed for in case the hand is changed some other way.
+        self._revenue_hand = b""
+        self._revenue = np.zeros(cards.NUM_DISTINCT_CARDS, dtype=np.int64)
+        self._two_dice: Optional[bool] = None
+        # Set by `simulate` to time each phase of a turn.
+        self.profiler: Optional[Profiler] = None
+
+    def copy(self) -> "PlayerState":
+        """A copy that can buy cards without changing this one."""
+        player_state = copy.copy(self)
+        player_state.hand = self.hand.copy()
+        return player_state
+
+    def _card_revenue(self) -> np.ndarray:
+        if self._revenue_hand != self.hand.counts.tobytes():
+            self._revenue = revenue_kernel(self.num_players).revenue(self.hand.counts)
+            self._revenue_hand = self.hand.counts.tobytes()
+            self._two_dice = None
+        return self._revenue
+
+    def expected_revenue(self) -> HandRevenue:
+        """The average revenue the current hand will yield on each kind of turn."""
+        return REVENUE_CACHE.get(self.hand, self.num_players, self._card_revenue(), self.dice)
+
+    def roll_two(self, strategy: Strategy) -> bool:
+        """
+        Whether the strategy rolls two dice now.
+
+        A policy marked with `hand_only` is only asked again once the hand changes.
+        """
+        if not getattr(strategy.roll_two, "hand_only", False):
+            return strategy.roll_two(self)
+        # Forget the last answer if the hand was changed without `_add_card`.
+        self._card_revenue()
+        if self._two_dice is None:
+            self._two_dice = strategy.roll_two(self)
+        return self._two_dice
+
+    def gross_expected_revenue(self, strategy: Strategy) -> float:
+        """The same as `gross_expected_revenue` for the current hand."""
+        return self.expected_revenue().gross(self.roll_two(strategy), self.num_players)
+
+    def _add_card(self, card: Card) -> None:
+        # Only the cards that pay for this card change their revenue, so update the revenue in place.
+        revenue = self._card_revenue()
+        kernel = revenue_kernel(self.num_players)
+        i = cards.card_id(card)
+        self._revenue = revenue + kernel.linear[:, i] + kernel.presence[:, i] * (self.hand.counts[i] == 0)
+        self.hand.append(card)
+        self._revenue_hand = self.hand.counts.tobytes()
+        self._two_dice = None
 
     def update_my_turn(self, strategy: Strategy, round_number: int) -> Optional[Card]:
-        two_dice = strategy.roll_two(self)
-        self.coins += expected_revenue_my_turn(self.hand, two_dice, self.num_players)
+        profiler = self.profiler
+        two_dice = self.roll_two(strategy)
+        if profiler is not None:
+            profiler.lap("my turn;dice decision")
+        self.coins += self.expected_revenue().my_turn(two_dice)
+        if profiler is not None:
+            profiler.lap("my turn;income")
         card_to_buy = strategy.buy(self, round_number)
+        if profiler is not None:
+            profiler.lap("my turn;buy decision")
         if card_to_buy is not None:
-            self.hand.append(card_to_buy)
+            self._add_card(card_to_buy)
             self.coins -= card_to_buy.cost
             if self.coins < 0:
                 raise InvalidStrategyError(f"Buying a {card_to_buy.name} in round {round_number} is expected to result in a negative number of coins ({self.coins}).")
+            if profiler is not None:
+                profiler.lap("my turn;purchase")
         return card_to_buy
 
     def update_other_turn(self, round_number: int) -> None:
         # Assume that other players always roll one die.
-        two_dice = False
-        self.coins += expected_revenue_other_turn(self.hand, two_dice, self.num_players)
+        self.coins += self.expected_revenue().other_turn
+        if self.profiler is not None:
+            self.profiler.lap("other turn;income")
 
     def is_winner(self) -> bool:
         return all(c in self.hand for c in VICTORY_CARDS)
 
-def _partition(xs, predicate):
-    return [x for x in xs if predicate(x)], [x for x in xs if not predicate(x)]
+# Buying no cards except for the victory cards, in any order, is expected to win in well under 100 rounds.
+MAX_ROUNDS = 100
+
+class GameLog:
+    """
+    The turn-by-turn log of a simulation, stored in one preallocated NumPy structured array.
+
+    The columns are the same as the `pd.DataFrame` returned by `simulate`,
+    except that "Turn" is 0 before the game starts and "Bought Card" holds card ids, with -1 for no card.
+    """
+    DTYPE = np.dtype([
+        ("Round", np.int16),
+        ("Turn", np.int8),
+        ("Coins", np.float64),
+        ("Expected Coins per Roll", np.float64),
+        ("# Cards", np.int16),
+        ("# Victory Cards", np.int8),
+        ("Bought Card", np.int8)
+    ])
+
+    def __init__(self, capacity: int):
+        self._rows = np.zeros(capacity, dtype=GameLog.DTYPE)
+        self._length = 0
+        self._dataframe: Optional["pd.DataFrame"] = None
+
+    @staticmethod
+    def from_rows(rows: np.ndarray) -> "GameLog":
+        """A log holding rows that were saved from another log."""
+        game_log = GameLog(capacity=len(rows))
+        game_log._rows[:] = rows
+        game_log._length = len(rows)
+        return game_log
+
+    def append(self, round_number: int, turn_number: int, coins: float, expected_coins: float,
+               num_cards: int, num_victory_cards: int, bought_card: Optional[Card]) -> None:
+        self._rows[self._length] = (
+            round_number, turn_number, coins, expected_coins, num_cards, num_victory_cards,
+            -1 if bought_card is None else bought_card.id)
+        self._length += 1
 
-def simulate(strategy: Strategy, num_players: int) -> pd.DataFrame:
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows[:self._length]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.rows[column]
+
+    def bought_cards(self) -> List[Card]:
+        return [cards.distinct_cards[i] for i in self["Bought Card"] if i >= 0]
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """The log in the form `simulate` returns by default, built the first time it is asked for."""
+        if self._dataframe is None:
+            import pandas as pd
+
+            rows = self.rows
+            self._dataframe = pd.DataFrame({
+                "Round": rows["Round"].astype(np.int64),
+                "Turn": np.where(rows["Turn"] == 0, np.nan, rows["Turn"]),
+                "Coins": rows["Coins"],
+                "Expected Coins per Roll": rows["Expected Coins per Roll"],
+                "# Cards": rows["# Cards"].astype(np.int64),
+                "# Victory Cards": rows["# Victory Cards"].astype(np.int64),
+                "Bought Card": [None if i < 0 else cards.distinct_cards[i] for i in rows["Bought Card"]]
+            })
+        return self._dataframe
+
+@dataclass
+class SimulationSummary:
+    """Just what a strategy summary needs from a simulation, with no turn-by-turn log."""
+    rounds_to_win: int
+    max_expected_coins_per_roll: float
+    scores_on: Set[int]
+
+def simulate(
+    strategy: Strategy,
+    num_players: int,
+    log: str = "dataframe",
+    profiler: Optional[Profiler] = None,
+    dice: DiceModel = FAIR,
+    engine: str = "turns"
+) -> Union["pd.DataFrame", GameLog, SimulationSummary]:
     """
     Execute a strategy to see how many turns it takes to win.
+
+    log -- How much to record about the game:
+        "dataframe" for a `pd.DataFrame` with a row for every turn,
+        "array" for the same rows in a `GameLog`, which only builds the `pd.DataFrame` if asked,
+        or "summary" for just a `SimulationSummary`.
+    profiler -- Add the time spent in each phase of the game to this `Profiler`.
+    dice -- The dice to compute the expected income with.
+    engine -- "turns" to play every turn,
+        or "events" to skip from one purchase to the next with `fast_forward`, which needs a `BuildOrder` strategy.
+        Both give exactly the same results.
     """
     if not (2 <= num_players <= 4):
         raise ValueError()
+    if log not in ("dataframe", "array", "summary"):
+        raise ValueError(f"Unknown log mode: {log}")
+    if engine == "events":
+        if profiler is not None:
+            raise ValueError("The profiler only times the turn-by-turn engine.")
+        from . import fast_forward
+        result = fast_forward.simulate(strategy, num_players, dice)
+        if log == "summary":
+            return result.summary()
+        game_log = result.to_game_log()
+        return game_log if log == "array" else game_log.to_dataframe()
+    elif engine != "turns":
+        raise ValueError(f"Unknown engine: {engine}")
 
-    player_state = PlayerState(num_players)
-    victory_cards, cards = _partition(player_state.hand, _is_victory_card)
-    game_log: Dict[str, List[Any]] = {
-        "Round": [0],
-        "Turn": [None],
-        "Coins": [player_state.coins],
-        "Expected Coins per Roll": [gross_expected_revenue(player_state.hand, strategy.roll_two(player_state), num_players)],
-        "# Cards": [len(cards)],
-        "# Victory Cards": [len(victory_cards)],
-        "Bought Card": [None]
-    }
+    if profiler is not None:
+        profiler.start()
+    player_state = PlayerState(num_players, dice)
+    player_state.profiler = profiler
+    num_victory_cards = sum(player_state.hand.count(c) for c in VICTORY_CARDS)
+    num_cards = len(player_state.hand) - num_victory_cards
+    expected_coins = player_state.gross_expected_revenue(strategy)
+    if log == "summary":
+        max_expected_coins = expected_coins
+        scores_on = set()
+        for card in player_state.hand:
+            scores_on |= card.activates_on
+    else:
+        game_log = GameLog(capacity=1 + MAX_ROUNDS * num_players)
+        game_log.append(0, 0, player_state.coins, expected_coins, num_cards, num_victory_cards, None)
+    if profiler is not None:
+        profiler.lap("setup")
 
-    # Buying no cards except for the victory cards, in any order, is expected to win in well under 100 rounds.
-    MAX_ROUNDS = 100
     for round_number in range(1, MAX_ROUNDS + 1):
         for turn_number in range(1, player_state.num_players + 1):
             # Assume the one player we're keeping track of goes first in each round.
@@ -111,52 +399,132 @@ def simulate(strategy: Strategy, num_players: int) -> pd.DataFrame:
                 player_state.update_other_turn(round_number)
                 bought_card = None
 
-            victory_cards, cards = _partition(player_state.hand, _is_victory_card)
-            game_log["Round"].append(round_number)
-            game_log["Turn"].append(turn_number)
-            game_log["Coins"].append(player_state.coins)
-            game_log["Expected Coins per Roll"].append(gross_expected_revenue(player_state.hand, strategy.roll_two(player_state), num_players))
-            game_log["# Cards"].append(len(cards))
-            game_log["# Victory Cards"].append(len(victory_cards))
-            game_log["Bought Card"].append(bought_card)
-            if player_state.is_winner():
-                return pd.DataFrame(game_log)
-    raise InvalidStrategyError("The strategy does not buy all four victory cards within 100 rounds.")
-
-def aggregate_scores_on(simulation: pd.DataFrame) -> Set[int]:
+            if bought_card is not None:
+                if _is_victory_card(bought_card):
+                    num_victory_cards += 1
+                else:
+                    num_cards += 1
+            expected_coins = player_state.gross_expected_revenue(strategy)
+            if profiler is not None:
+                profiler.lap("expected revenue")
+            if log == "summary":
+                max_expected_coins = max(max_expected_coins, expected_coins)
+                if bought_card is not None:
+                    scores_on |= bought_card.activates_on
+            else:
+                game_log.append(round_number, turn_number, player_state.coins, expected_coins,
+                                num_cards, num_victory_cards, bought_card)
+            if profiler is not None:
+                profiler.lap("logging")
+
+            won = bought_card is not None and player_state.is_winner()
+            if profiler is not None:
+                profiler.lap("victory check")
+            if won:
+                if log == "summary":
+                    return SimulationSummary(round_number, max_expected_coins, scores_on)
+                elif log == "array":
+                    return game_log
+                else:
+                    return game_log.to_dataframe()
+    raise InvalidStrategyError(f"The strategy does not buy all four victory cards within {MAX_ROUNDS} rounds.")
+
+def aggregate_scores_on(simulation: Union["pd.DataFrame", GameLog, SimulationSummary]) -> Set[int]:
     """
     Count up all of the rolls that a strategy scores on.
     """
+    if isinstance(simulation, SimulationSummary):
+        return simulation.scores_on
+    elif isinstance(simulation, GameLog):
+        bought_cards = simulation.bought_cards()
+    else:
+        bought_cards = [card for card in simulation["Bought Card"] if card is not None]
+
     scores_on = set([1, 2, 3]) # from starting cards
-    for card in simulation["Bought Card"]:
-        if card is not None:
-            scores_on = scores_on.union(card.activates_on)
+    for card in bought_cards:
+        scores_on = scores_on.union(card.activates_on)
     return scores_on
 
-def _from_build_order(build_order: List[Card]):
+class BuildOrder:
     """
-    Implement a buying strategy by defining a list of cards to buy in order
-    and a predicate for when to roll two dice.
+    A buying strategy that buys a list of cards in order,
+    each one as soon as the player has the coins for it.
     """
-    next_card = None
-    def buy_strategy(player_state, round_number) -> Optional[Card]:
-        nonlocal next_card
-        if next_card is None:
-            next_card = build_order.pop(0)
+    def __init__(self, build_order: List[Card]):
+        self.cards = list(build_order)
+        self.next_index = 0
+
+    def __call__(self, player_state: "PlayerState", round_number: int) -> Optional[Card]:
+        if self.next_index == len(self.cards):
+            raise InvalidStrategyError("The strategy does not buy all four victory cards.")
+        next_card = self.cards[self.next_index]
         if player_state.coins >= next_card.cost:
-            result = next_card
-            next_card = None
-            return result
+            self.next_index += 1
+            return next_card
         else:
             return None
-    return buy_strategy
 
+    def hands(self) -> List[Hand]:
+        """The hand held before each purchase, starting from the opening hand and ending with the full build order."""
+        hand = starting_hand()
+        result = [hand.copy()]
+        for card in self.cards:
+            hand.append(card)
+            result.append(hand.copy())
+        return result
+
+def _from_build_order(build_order: List[Card]) -> BuildOrder:
+    """
+    Implement a buying strategy by defining a list of cards to buy in order
+    and a predicate for when to roll two dice.
+    """
+    return BuildOrder(build_order)
+
+def hand_only(roll_two: Strategy.RollTwo) -> Strategy.RollTwo:
+    """Mark a dice policy as depending only on the player's hand, so `PlayerState` asks it once per hand."""
+    roll_two.hand_only = True
+    return roll_two
+
+@hand_only
 def roll_two_never(player_state):
     return False
 
+@hand_only
 def roll_two_always_after_train_station(player_state):
     return cards.TrainStation() in player_state.hand
 
+# The dice policies a `StrategySpec` can refer to by name.
+ROLL_TWO_POLICIES: Dict[str, Strategy.RollTwo] = {
+    "never": roll_two_never,
+    "always_after_train_station": roll_two_always_after_train_station
+}
+
+@dataclass(frozen=True)
+class StrategySpec:
+    """
+    A build order strategy in a plain form that can be hashed, pickled and sent to other processes.
+
+    build_order -- The ids of the cards to buy, in order.
+    roll_two -- The name of a dice policy in `ROLL_TWO_POLICIES`.
+    """
+    build_order: Tuple[int, ...]
+    roll_two: str
+
+    @staticmethod
+    def from_strategy(strategy: Strategy) -> "StrategySpec":
+        if not isinstance(strategy.buy, BuildOrder):
+            raise TypeError("Only strategies that buy from a `BuildOrder` can be described by a `StrategySpec`.")
+        roll_two = [name for name, policy in ROLL_TWO_POLICIES.items() if policy is strategy.roll_two]
+        if not roll_two:
+            raise TypeError(f"The dice policy {strategy.roll_two.__name__} is not in `ROLL_TWO_POLICIES`.")
+        return StrategySpec(tuple(cards.card_id(c) for c in strategy.buy.cards), roll_two[0])
+
+    def to_strategy(self) -> Strategy:
+        """Create a fresh `Strategy` that starts from the beginning of the build order."""
+        return Strategy(
+            buy=BuildOrder([cards.distinct_cards[i] for i in self.build_order]),
+            roll_two=ROLL_TWO_POLICIES[self.roll_two])
+
 # Buy a shopping mall first since it adds a bonus to our bakery.
 # We expect 1/6 + 1/12 = 1/4 coins per roll = 1 coin per turn in a 4-player game.
 # Buying the shopping mall will double our bakery's expected value,
@@ -164,8 +532,8 @@ def roll_two_always_after_train_station(player_state):
 # With this optimization, we expect to win one round faster (40 vs. 41).
 # The radio tower will also bump up our expected coins, but we aren't accounting for that yet in our model.
 def buy_nothing():
-    # These need to be functions so they can be rerunnable with the `nonlocal`
-    # in `_from_build_order`.
+    # These need to be functions so that each simulation starts
+    # from the beginning of a fresh `BuildOrder`.
     return Strategy(
         buy=_from_build_order([
             cards.ShoppingMall(),
@@ -273,4 +641,112 @@ def fast_train_to_big_cheese():
             cards.AmusementPark(),
             cards.ShoppingMall(),
         ]),
-        roll_two=roll_two_always_after_train_station)
\ No newline at end of file
+        roll_two=roll_two_always_after_train_station)
+
+# The strategies above by name, for picking one from the command line.
+NAMED_STRATEGIES: Dict[str, Callable[[], Strategy]] = {
+    "buy_nothing": buy_nothing,
+    "buy_everything": buy_everything,
+    "highest_margin": highest_margin,
+    "big_convenience_store": big_convenience_store,
+    "fast_train_to_factory": fast_train_to_factory,
+    "fast_train_to_big_cheese": fast_train_to_big_cheese
+}
+
+@dataclass(frozen=True)
+class TournamentJob:
+    """
+    One entry of a tournament: a strategy played with a number of players.
+
+    num_games -- How many Monte Carlo games to play with `seed`, or 0 to only run `simulate`.
+    """
+    name: str
+    strategy: StrategySpec
+    num_players: int
+    num_games: int = 0
+    seed: Optional[int] = None
+
+def _run_tournament_job(job: TournamentJob) -> Dict[str, Any]:
+    # Imported here because `monte_carlo` builds on this module.
+    from . import monte_carlo
+
+    result = simulate(job.strategy.to_strategy(), job.num_players, log="summary")
+    row = {
+        "Name": job.name,
+        "# Players": job.num_players,
+        "Dice Policy": job.strategy.roll_two,
+        "Exp. Rounds to Win": result.rounds_to_win,
+        "Max Exp. Coins/Roll": result.max_expected_coins_per_roll,
+        "Scores On": aggregate_scores_on(result)
+    }
+    if job.num_games > 0:
+        rounds_to_win = monte_carlo.simulate(job.strategy.to_strategy(), job.num_players, job.num_games, job.seed)
+        row["Mean Rounds to Win"] = rounds_to_win.mean()
+        row["Std. Rounds to Win"] = rounds_to_win.std()
+        row["Unfinished Games"] = rounds_to_win.unfinished_rate()
+    return row
+
+def tournament_jobs(
+    strategies: Dict[str, Union[StrategySpec, Callable[[], Strategy]]],
+    player_counts: Iterable[int] = range(2, 5),
+    dice_policies: Optional[Iterable[str]] = None,
+    num_games: int = 0,
+    seed: Optional[int] = None
+) -> List[TournamentJob]:
+    """
+    Cross every strategy with every player count and dice policy.
+
+    strategies -- Maps a name to a `StrategySpec` or a function returning a build order `Strategy`.
+    dice_policies -- Names in `ROLL_TWO_POLICIES` to try in place of each strategy's own policy.
+    seed -- Each job gets its own independent seed derived from this one.
+    """
+    specs = {
+        name: s if isinstance(s, StrategySpec) else StrategySpec.from_strategy(s())
+        for name, s in strategies.items()
+    }
+    # These are gone through once for each strategy, so a generator has to be read into a tuple first.
+    player_counts = tuple(player_counts)
+    dice_policies = tuple(dice_policies or ()) or (None,)
+    combinations = [
+        (name, spec if policy is None else StrategySpec(spec.build_order, policy), num_players)
+        for name, spec in specs.items()
+        for policy in dice_policies
+        for num_players in player_counts
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(combinations))
+    return [
+        TournamentJob(name, spec, num_players, num_games, int(job_seed.generate_state(1)[0]))
+        for (name, spec, num_players), job_seed in zip(combinations, seeds)
+    ]
+
+def iter_tournament(jobs: List[TournamentJob], max_workers: Optional[int] = None) -> Iterator[Tuple[TournamentJob, Dict[str, Any]]]:
+    """
+    Run tournament jobs across a pool of processes, yielding each job with its summary row as soon as it finishes.
+
+    max_workers -- Defaults to the number of CPUs.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_run_tournament_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def tournament(
+    strategies: Dict[str, Union[StrategySpec, Callable[[], Strategy]]],
+    player_counts: Iterable[int] = range(2, 5),
+    dice_policies: Optional[Iterable[str]] = None,
+    num_games: int = 0,
+    seed: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> "pd.DataFrame":
+    """
+    Simulate every strategy with every player count in parallel and summarize the results in one table.
+
+    See `tournament_jobs` for the parameters.
+    """
+    import pandas as pd
+
+    jobs = tournament_jobs(strategies, player_counts, dice_policies, num_games, seed)
+    rows = dict(iter_tournament(jobs, max_workers))
+    return pd.DataFrame([rows[job] for job in jobs])
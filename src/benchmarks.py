@@ -0,0 +1,180 @@
+"""
+Benchmarks for the hot paths of the analysis.
+
+Run the benchmarks and save the results as a baseline:
+
+    python benchmarks.py run --output baseline.json
+
+Run them again later and flag anything that got more than 10% slower:
+
+    python benchmarks.py run --output current.json
+    python benchmarks.py compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import analysis.cards
+
+from analysis import monte_carlo, multiplayer, prefix_cache, report, strategies
+from machi_koro import cards
+from machi_koro.cards import Hand
+from typing import Any, Callable, Dict, List
+
+NAMED_STRATEGIES = strategies.NAMED_STRATEGIES
+
+def _measure(function: Callable[[], Any], repeat: int, items_per_call: int = 1) -> Dict[str, float]:
+    """Time `function` `repeat` times, after one untimed call to warm up caches."""
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "repeat": repeat,
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "seconds_per_item": median / items_per_call,
+        "throughput_per_second": items_per_call / median if median > 0 else float("inf")
+    }
+
+def _random_hand(size: int, rng: random.Random) -> List[cards.Card]:
+    return [rng.choice(cards.distinct_cards) for _ in range(size)]
+
+def run(hand_sizes: List[int], num_games: int, repeat: int) -> Dict[str, Any]:
+    """Run every benchmark and return the results keyed by benchmark name."""
+    rng = random.Random(0)
+    results: Dict[str, Any] = {}
+
+    def record(name: str, params: Dict[str, Any], measurement: Dict[str, float]) -> None:
+        results[name] = {"params": params, **measurement}
+        print(f"{name:60} {measurement['seconds_per_item'] * 1e6:12.1f} us each  {measurement['throughput_per_second']:14.1f} /s", flush=True)
+
+    for two_dice in (False, True):
+        record(f"cards.run[two_dice={two_dice}]", {"two_dice": two_dice},
+               _measure(lambda: analysis.cards.run(two_dice), repeat))
+
+    grid = analysis.cards.hand_grid({
+        cards.Ranch(): range(7), cards.Forest(): range(7), cards.Mine(): range(7),
+        cards.WheatField(): range(7), cards.ShoppingMall(): range(2)
+    })
+    record(f"cards.sweep[{len(grid) * 6} scenarios]", {"scenarios": len(grid) * 6},
+           _measure(lambda: analysis.cards.sweep(grid), repeat, len(grid) * 6))
+
+    for name, strategy in NAMED_STRATEGIES.items():
+        for num_players in range(2, 5):
+            record(f"strategies.simulate[{name},{num_players}p]", {"strategy": name, "num_players": num_players},
+                   _measure(lambda: [strategies.simulate(strategy(), num_players) for _ in range(num_games)], repeat, num_games))
+
+    for size in hand_sizes:
+        hand = _random_hand(size, rng)
+        counts = Hand(hand)
+        record(f"gross_expected_revenue[list,{size}]", {"hand_size": size, "hand_type": "list"},
+               _measure(lambda: strategies.gross_expected_revenue(hand, True, 4), repeat))
+        record(f"gross_expected_revenue[Hand,{size}]", {"hand_size": size, "hand_type": "Hand"},
+               _measure(lambda: strategies.gross_expected_revenue(counts, True, 4), repeat))
+
+    record("card construction", {"cards": len(cards.distinct_cards)},
+           _measure(lambda: [type(c)() for c in cards.distinct_cards], repeat, len(cards.distinct_cards)))
+    for size in hand_sizes:
+        hand = _random_hand(size, rng)
+        record(f"Hand construction[{size}]", {"hand_size": size},
+               _measure(lambda: Hand(hand), repeat))
+
+    record(f"monte_carlo.simulate[highest_margin,4p,{num_games * 1000}]", {"strategy": "highest_margin", "num_players": 4, "num_games": num_games * 1000},
+           _measure(lambda: monte_carlo.simulate(strategies.highest_margin(), 4, num_games * 1000, seed=0), repeat, num_games * 1000))
+
+    table = [strategies.highest_margin(), strategies.big_convenience_store(),
+             strategies.fast_train_to_factory(), strategies.fast_train_to_big_cheese()]
+    record(f"multiplayer.simulate[4p,{num_games * 1000}]", {"num_players": 4, "num_games": num_games * 1000},
+           _measure(lambda: multiplayer.simulate(table, num_games * 1000, seed=0), repeat, num_games * 1000))
+
+    # Variants of each named build order with a Wheat Field slipped in somewhere, which share their starts.
+    variants = []
+    for strategy in NAMED_STRATEGIES.values():
+        spec = strategies.StrategySpec.from_strategy(strategy())
+        for i in range(len(spec.build_order) + 1):
+            build_order = spec.build_order[:i] + (cards.card_id(cards.WheatField()),) + spec.build_order[i:]
+            variants.append(strategies.StrategySpec(build_order, spec.roll_two))
+
+    def simulate_variants():
+        cache = prefix_cache.SimulationCache(4)
+        return [cache.simulate(v, log="summary") for v in variants]
+
+    record(f"prefix_cache.simulate[{len(variants)} variants,4p]", {"variants": len(variants), "num_players": 4},
+           _measure(simulate_variants, repeat, len(variants)))
+    record(f"strategies.simulate[{len(variants)} variants,4p,events]", {"variants": len(variants), "num_players": 4},
+           _measure(lambda: [strategies.simulate(v.to_strategy(), 4, log="summary", engine="events") for v in variants], repeat, len(variants)))
+
+    import pandas as pd
+
+    trace = strategies.simulate(strategies.buy_everything(), 4)
+    long_trace = pd.concat([trace] * (num_games * 10000 // len(trace) + 1), ignore_index=True)
+    record(f"report.trace_html[{len(long_trace)} rows]", {"rows": len(long_trace)},
+           _measure(lambda: report.trace_html(long_trace), max(1, repeat // 10), len(long_trace)))
+
+    return results
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """The names of the benchmarks whose median time grew by more than `threshold` (a fraction) since the baseline."""
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median_seconds"]
+        after = result["median_seconds"]
+        change = after / before - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:60} {before * 1e6:12.1f} us -> {after * 1e6:12.1f} us  {change:+8.1%}  {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of the Machi Koro analysis.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--output", help="Save the results to this JSON file.")
+    run_parser.add_argument("--hand-sizes", type=int, nargs="+", default=[2, 8, 32, 128], help="Hand sizes for the per-hand benchmarks.")
+    run_parser.add_argument("--games", type=int, default=10, help="Games per call in the simulation benchmarks (thousands for Monte Carlo).")
+    run_parser.add_argument("--repeat", type=int, default=20, help="Timed calls per benchmark.")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved runs.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown (as a fraction) to flag as a regression.")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run(args.hand_sizes, args.games, args.repeat)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({
+                    "metadata": {
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "python": platform.python_version(),
+                        "numpy": np.__version__,
+                        "machine": platform.platform()
+                    },
+                    "results": results
+                }, f, indent=2)
+        return 0
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
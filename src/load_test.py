@@ -0,0 +1,130 @@
+"""
+Load test the buy-advisor service on localhost.
+
+Start the service in another process and test it:
+
+    python load_test.py --requests 20000 --connections 4
+
+Or test a service that is already running:
+
+    python load_test.py --port 8765
+
+Queries are the hands the named strategies hold along their build orders,
+with random coins and player counts, sent over keep-alive connections at the same time.
+Prints latency percentiles and throughput, and fails if the 99th percentile is over `--max-p99-ms`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from analysis import strategies
+from typing import List, Optional
+
+def _queries(num_queries: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    hands = [
+        {card.name: hand.count(card) for card in set(hand)}
+        for strategy in strategies.NAMED_STRATEGIES.values()
+        for hand in strategy().buy.hands()
+    ]
+    return [
+        json.dumps({"hand": rng.choice(hands), "coins": rng.randrange(30), "players": rng.randrange(2, 5)}).encode()
+        for _ in range(num_queries)
+    ]
+
+def _request(body: bytes) -> bytes:
+    return (
+        b"POST /advice HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status_line, *header_lines = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")
+    length = 0
+    for line in header_lines:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+async def _client(host: str, port: int, queries: List[bytes], latencies: List[float], errors: List[int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    for body in queries:
+        start = time.perf_counter()
+        writer.write(_request(body))
+        await writer.drain()
+        status = await _read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+    writer.close()
+
+async def run(host: str, port: int, num_requests: int, connections: int, seed: int = 0):
+    queries = _queries(num_requests, seed)
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, queries[i::connections], latencies, errors)
+        for i in range(connections)
+    ])
+    return np.array(latencies), errors, time.perf_counter() - start
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_service(port: int) -> subprocess.Popen:
+    service = subprocess.Popen(
+        [sys.executable, "-m", "analysis", "serve", "--port", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE)
+    # The service prints a line once it is listening.
+    service.stdout.readline()
+    return service
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the buy-advisor service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="The port of a running service. By default, start one.")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--max-p99-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    service = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        service = _start_service(port)
+    try:
+        latencies, errors, seconds = asyncio.run(run(args.host, port, args.requests, args.connections))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+    print(f"{len(latencies)} requests over {args.connections} connections in {seconds:.2f} s "
+          f"({len(latencies) / seconds:.0f} requests/s)")
+    print(f"latency: p50 {p50:.2f} ms  p90 {p90:.2f} ms  p99 {p99:.2f} ms  max {latencies.max() * 1e3:.2f} ms")
+    if errors:
+        print(f"{len(errors)} requests failed")
+        return 1
+    if p99 > args.max_p99_ms:
+        print(f"p99 latency is over {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
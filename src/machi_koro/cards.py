@@ -1,7 +1,9 @@
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Set
+from typing import Dict, FrozenSet, Iterable, Iterator, List
+
+import numpy as np
 
 class Color(Enum):
     RED = 0
@@ -20,235 +22,309 @@ class Symbol(Enum):
     FACTORY = 6
     FRUIT = 7
 
-class Card(metaclass=ABCMeta):
+class _CardMeta(ABCMeta):
+    """Makes every card class a flyweight: calling it always returns the one instance of that card."""
+    def __call__(cls):
+        instance = cls.__dict__.get("_instance")
+        if instance is None:
+            instance = super().__call__()
+            instance.activation_mask = sum(1 << n for n in instance.activates_on)
+            cls._instance = instance
+        return instance
+
+class Card(metaclass=_CardMeta):
+    """
+    A card in the game.
+
+    There is only one instance of each kind of card, and its attributes can't be changed once they are set.
+    `id` is the card's index in `distinct_cards`,
+    and bit `n` of `activation_mask` is set if the card activates on a roll of `n`.
+    """
+    __slots__ = ("name", "color", "symbol", "cost", "activates_on", "activation_mask", "id")
+
     name: str
     color: Color
     symbol: Symbol
     cost: int
-    activates_on: Set[int]
+    activates_on: FrozenSet[int]
+    activation_mask: int
+    id: int
 
     @abstractmethod
     def revenue(self, hand: List["Card"], num_players: int) -> int:
         pass
 
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__}.{name} can't be changed.")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__}.{name} can't be changed.")
+
     def __eq__(self, other):
         return type(self) == type(other)
 
+    def __hash__(self):
+        return hash(type(self))
+
+    def __reduce__(self):
+        # Unpickle to the existing instance rather than a copy.
+        return (type(self), ())
+
 class WheatField(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Wheat Field"
         self.color = Color.BLUE
         self.symbol = Symbol.WHEAT
         self.cost = 1
-        self.activates_on = set([1])
+        self.activates_on = frozenset([1])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 1
 
 class Ranch(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Ranch"
         self.color = Color.BLUE
         self.symbol = Symbol.COW
         self.cost = 1
-        self.activates_on = set([2])
+        self.activates_on = frozenset([2])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 1
 
 class Bakery(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Bakery"
         self.color = Color.GREEN
         self.symbol = Symbol.BOX
         self.cost = 1
-        self.activates_on = set([2, 3])
+        self.activates_on = frozenset([2, 3])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 1 + ShoppingMall.bonus(hand)
 
 class Cafe(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Cafe"
         self.color = Color.RED
         self.symbol = Symbol.CUP
         self.cost = 2
-        self.activates_on = set([3])
+        self.activates_on = frozenset([3])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 1 + ShoppingMall.bonus(hand)
 
 class ConvenienceStore(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Convenience Store"
         self.color = Color.GREEN
         self.symbol = Symbol.BOX
         self.cost = 2
-        self.activates_on = set([4])
+        self.activates_on = frozenset([4])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 3 + ShoppingMall.bonus(hand)
 
 class Forest(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Forest"
         self.color = Color.BLUE
         self.symbol = Symbol.GEAR
         self.cost = 3
-        self.activates_on = set([5])
+        self.activates_on = frozenset([5])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 1
 
 class Stadium(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Stadium"
         self.color = Color.PURPLE
         self.symbol = Symbol.TOWER
         self.cost = 6
-        self.activates_on = set([6])
+        self.activates_on = frozenset([6])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 2 * (num_players - 1)
 
 class TvStation(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "TV Station"
         self.color = Color.PURPLE
         self.symbol = Symbol.TOWER
         self.cost = 7
-        self.activates_on = set([6])
+        self.activates_on = frozenset([6])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 5
 
 class BusinessCenter(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Business Center"
         self.color = Color.PURPLE
         self.symbol = Symbol.TOWER
         self.cost = 8
-        self.activates_on = set([6])
+        self.activates_on = frozenset([6])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 0
 
 class CheeseFactory(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Cheese Factory"
         self.color = Color.GREEN
         self.symbol = Symbol.FACTORY
         self.cost = 5
-        self.activates_on = set([7])
+        self.activates_on = frozenset([7])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         cow_cards = [x for x in hand if x.symbol == Symbol.COW]
         return 3 * len(cow_cards)
 
 class FurnitureFactory(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Furniture Factory"
         self.color = Color.GREEN
         self.symbol = Symbol.FACTORY
         self.cost = 3
-        self.activates_on = set([8])
+        self.activates_on = frozenset([8])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         gear_cards = [x for x in hand if x.symbol == Symbol.GEAR]
         return 3 * len(gear_cards)
 
 class Mine(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Mine"
         self.color = Color.BLUE
         self.symbol = Symbol.GEAR
         self.cost = 6
-        self.activates_on = set([9])
+        self.activates_on = frozenset([9])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 5
 
 class FamilyRestaurant(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Family Restaurant"
         self.color = Color.RED
         self.symbol = Symbol.CUP
         self.cost = 3
-        self.activates_on = set([9, 10])
+        self.activates_on = frozenset([9, 10])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 2 + ShoppingMall.bonus(hand)
 
 class AppleOrchard(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Apple Orchard"
         self.color = Color.BLUE
         self.symbol = Symbol.WHEAT
         self.cost = 3
-        self.activates_on = set([10])
+        self.activates_on = frozenset([10])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 3
 
 class FruitVegetableMarket(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Fruit and Vegetable Market"
         self.color = Color.GREEN
         self.symbol = Symbol.FRUIT
         self.cost = 2
-        self.activates_on = set([11, 12])
+        self.activates_on = frozenset([11, 12])
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         wheat_cards = [x for x in hand if x.symbol == Symbol.WHEAT]
         return 2 * len(wheat_cards)
 
 class TrainStation(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Train Station"
         self.color = Color.GOLD
         self.symbol = Symbol.TOWER
         self.cost = 4
-        self.activates_on = set()
+        self.activates_on = frozenset()
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 0
 
 class ShoppingMall(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Shopping Mall"
         self.color = Color.GOLD
         self.symbol = Symbol.TOWER
         self.cost = 10
-        self.activates_on = set()
+        self.activates_on = frozenset()
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 0
 
     @staticmethod
     def bonus(hand: List[Card]) -> int:
-        if any(isinstance(c, ShoppingMall) for c in hand):
+        if ShoppingMall() in hand:
             return 1
         else:
             return 0
 
 class AmusementPark(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Amusement Park"
         self.color = Color.GOLD
         self.symbol = Symbol.TOWER
         self.cost = 16
-        self.activates_on = set()
+        self.activates_on = frozenset()
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 0
 
 class RadioTower(Card):
+    __slots__ = ()
+
     def __init__(self):
         self.name = "Radio Tower"
         self.color = Color.GOLD
         self.symbol = Symbol.TOWER
         self.cost = 22
-        self.activates_on = set()
+        self.activates_on = frozenset()
 
     def revenue(self, hand: List[Card], num_players: int) -> int:
         return 0
@@ -273,4 +349,86 @@ distinct_cards = [
     ShoppingMall(),
     AmusementPark(),
     RadioTower()
-]
\ No newline at end of file
+]
+
+for i, card in enumerate(distinct_cards):
+    card.id = i
+del i, card
+
+def card_id(card: Card) -> int:
+    """The index of a card in `distinct_cards`."""
+    return card.id
+
+NUM_DISTINCT_CARDS = len(distinct_cards)
+
+# The supply has six of each establishment.
+MAX_COPIES = 6
+
+def supply_limits(max_copies: int = MAX_COPIES) -> np.ndarray:
+    """
+    The most copies of each card a player can hold, indexed by card id.
+    You can only have one of each card with a tower symbol, which covers the purple cards and the victory cards.
+
+    max_copies -- The most copies of each other card.
+    """
+    return np.array([1 if card.symbol == Symbol.TOWER else max_copies for card in distinct_cards], dtype=np.int64)
+
+SUPPLY_LIMITS = supply_limits()
+
+# Look cards up by name without searching `distinct_cards`.
+CARD_IDS_BY_NAME: Dict[str, int] = {card.name: card.id for card in distinct_cards}
+
+def card_by_name(name: str) -> Card:
+    """The card with a name, such as "Wheat Field". Raises `KeyError` for an unknown name."""
+    return distinct_cards[CARD_IDS_BY_NAME[name]]
+
+class Hand:
+    """
+    A hand of cards stored as a count of each card, indexed by card id.
+
+    A `Hand` can be used anywhere a `List[Card]` is expected:
+    iterating over it yields each card as many times as it is held.
+    Hands are hashed by their counts, so a hand's hash is no longer valid once a card is added to it:
+    don't change a hand while it is a key in a dict or a member of a set.
+    """
+    counts: np.ndarray
+
+    def __init__(self, hand: Iterable[Card] = ()):
+        self.counts = np.zeros(NUM_DISTINCT_CARDS, dtype=np.int64)
+        for card in hand:
+            self.append(card)
+
+    @staticmethod
+    def from_counts(counts: Iterable[int]) -> "Hand":
+        hand = Hand()
+        hand.counts[:] = np.asarray(counts, dtype=np.int64)
+        return hand
+
+    def append(self, card: Card) -> None:
+        self.counts[card_id(card)] += 1
+
+    def count(self, card: Card) -> int:
+        return int(self.counts[card_id(card)])
+
+    def copy(self) -> "Hand":
+        return Hand.from_counts(self.counts)
+
+    def __contains__(self, card) -> bool:
+        return self.counts[card_id(card)] > 0
+
+    def __iter__(self) -> Iterator[Card]:
+        for i in np.flatnonzero(self.counts):
+            for _ in range(self.counts[i]):
+                yield distinct_cards[i]
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def __eq__(self, other):
+        return isinstance(other, Hand) and np.array_equal(self.counts, other.counts)
+
+    def __hash__(self):
+        return hash(self.counts.tobytes())
+
+    def __repr__(self):
+        return f"Hand({[card.name for card in self]})"
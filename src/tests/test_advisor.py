@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from analysis import advisor
+
+def test_advice_for_a_starting_hand():
+    status, body = advisor._route("POST", "/advice", b'{"hand": ["Wheat Field", "Bakery"], "coins": 3, "players": 4}')
+    assert status == 200
+    advice = json.loads(body)
+    assert advice["buy"] == advice["options"][0]["card"]
+    assert advice["roll_two"] is False
+
+@pytest.mark.parametrize("query", [
+    {"hand": {"Wheat Field": True}, "coins": 3, "players": 4},
+    {"hand": ["Wheat Field"], "coins": True, "players": 4},
+    {"hand": {"Radio Tower": 2}, "coins": 3, "players": 4},
+    {"hand": ["Wheat Field"], "coins": 3, "players": 5},
+])
+def test_rejects_impossible_queries(query):
+    status, _ = advisor._route("POST", "/advice", json.dumps(query).encode())
+    assert status == 400
+
+def test_rejects_body_that_is_not_utf8():
+    status, _ = advisor._route("POST", "/advice", b'\xff\xfe{')
+    assert status == 400
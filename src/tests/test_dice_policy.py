@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from analysis.dice_policy import DicePolicy
+from analysis.strategies import expected_revenue_my_turn
+from machi_koro import cards
+from machi_koro.cards import Hand
+
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+def test_table_matches_expected_revenue(num_players):
+    policy = DicePolicy.build(num_players, 2)
+    rng = np.random.default_rng(num_players)
+    train_station = cards.card_id(cards.TrainStation())
+    for _ in range(500):
+        counts = np.zeros(cards.NUM_DISTINCT_CARDS, dtype=np.int64)
+        counts[policy.relevant] = rng.integers(0, policy.caps + 1)
+        counts[train_station] = rng.integers(0, 2)
+        hand = Hand.from_counts(counts)
+        two_dice = expected_revenue_my_turn(hand, True, num_players)
+        one_die = expected_revenue_my_turn(hand, False, num_players)
+        if abs(two_dice - one_die) < 1e-9:
+            # Too close to call in floating point.
+            continue
+        assert policy.roll_two(hand.counts) == (hand.counts[train_station] > 0 and two_dice > one_die)
+    assert policy.fallbacks == 0
+
+def test_hands_past_the_table_are_worked_out_directly():
+    policy = DicePolicy.build(2, 1)
+    hand = Hand([cards.TrainStation()] + [cards.Ranch()] * 3 + [cards.CheeseFactory()] * 2)
+    assert policy.roll_two(hand.counts) == (expected_revenue_my_turn(hand, True, 2) > expected_revenue_my_turn(hand, False, 2))
+    assert policy.fallbacks == 1
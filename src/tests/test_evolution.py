@@ -0,0 +1,15 @@
+from analysis import evolution
+
+def _evolve(generations, seed, checkpoint=None):
+    return evolution.evolve(2, generations=generations, population_size=8, num_games=20, seed=seed, elite=2,
+                            max_workers=1, checkpoint=checkpoint)
+
+def test_resuming_from_a_checkpoint_matches_an_uninterrupted_run(tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    uninterrupted = _evolve(3, seed=0)
+    _evolve(1, seed=0, checkpoint=checkpoint)
+    # The games and the random state come from the checkpoint, not from the seed passed in again.
+    resumed = _evolve(3, seed=None, checkpoint=checkpoint)
+    assert resumed.best == uninterrupted.best
+    assert resumed.evaluations == uninterrupted.evaluations
+    assert resumed.cache_hits == uninterrupted.cache_hits
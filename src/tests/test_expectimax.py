@@ -0,0 +1,15 @@
+import pytest
+
+from analysis import expectimax, strategies
+from analysis.strategies import NAMED_STRATEGIES, StrategySpec
+
+@pytest.mark.parametrize("name", sorted(NAMED_STRATEGIES))
+def test_best_response_does_no_worse_than_the_opponent(name):
+    opponent = StrategySpec.from_strategy(NAMED_STRATEGIES[name]())
+    own = strategies.simulate(opponent.to_strategy(), 2, log="summary").rounds_to_win
+    response = strategies.simulate(expectimax.best_response(opponent, 0.01), 2, log="summary").rounds_to_win
+    assert response <= own
+
+def test_best_response_needs_an_opponent():
+    with pytest.raises(ValueError):
+        expectimax.BestResponse(expectimax.Solver(), 0.01)
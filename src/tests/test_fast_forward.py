@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from analysis import fast_forward, strategies
+from analysis.strategies import NAMED_STRATEGIES, Strategy, StrategySpec
+from machi_koro import cards
+
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+@pytest.mark.parametrize("name", sorted(NAMED_STRATEGIES))
+def test_fast_forward_matches_turns(name, num_players):
+    strategy = StrategySpec.from_strategy(NAMED_STRATEGIES[name]()).to_strategy()
+    expected = strategies.simulate(strategy, num_players, log="array").rows
+    # A `BuildOrder` keeps track of how far along it is, so play the other engine with a fresh one.
+    strategy = StrategySpec.from_strategy(NAMED_STRATEGIES[name]()).to_strategy()
+    assert np.array_equal(fast_forward.simulate(strategy, num_players).to_game_log().rows, expected)
+
+def test_rejects_dice_policy_not_marked_hand_only():
+    buy = StrategySpec.from_strategy(NAMED_STRATEGIES["highest_margin"]()).to_strategy().buy
+    # A policy that looks at the coins can change its mind between purchases.
+    strategy = Strategy(buy=buy, roll_two=lambda player_state: player_state.coins > 5)
+    with pytest.raises(TypeError):
+        fast_forward.simulate(strategy, 2)
+
+@pytest.mark.parametrize("engine", ["turns", "events"])
+def test_build_order_without_victory_cards_is_invalid(engine):
+    spec = StrategySpec.from_strategy(NAMED_STRATEGIES["highest_margin"]())
+    spec = StrategySpec(tuple(i for i in spec.build_order if cards.distinct_cards[i] not in strategies.VICTORY_CARDS), spec.roll_two)
+    with pytest.raises(strategies.InvalidStrategyError):
+        strategies.simulate(spec.to_strategy(), 2, engine=engine)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from analysis import income
+from analysis.strategies import starting_hand
+from machi_koro import cards
+from machi_koro.cards import Hand
+
+HANDS = [
+    starting_hand(),
+    Hand(list(starting_hand()) + [cards.Ranch(), cards.Ranch(), cards.CheeseFactory(), cards.Cafe(), cards.TrainStation()]),
+]
+
+@pytest.mark.parametrize("hand", HANDS)
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_repeated_distribution_matches_convolution(hand, num_players):
+    per_round = income.round_distribution(hand, num_players, True)
+    expected = np.ones(1)
+    for rounds in range(1, 6):
+        expected = np.convolve(expected, per_round.probabilities)
+        assert np.allclose(income.repeated_distribution(per_round, rounds).probabilities, expected, atol=1e-12)
+    assert income.income_over_rounds(hand, num_players, 5, True).mean() == pytest.approx(5 * per_round.mean())
+
+@pytest.mark.parametrize("hand", HANDS)
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_probability_to_afford_counts_only_turns_before_buying(hand, num_players):
+    my_turn = income.turn_distribution(hand, num_players, False).probabilities
+    other_turn = income.turn_distribution(hand, num_players, False, my_turn=False).probabilities
+    # Play turn by turn: you go first, so other players' turns only pay after you could have bought.
+    coins = np.ones(1)
+    expected = []
+    for _ in range(6):
+        coins = np.convolve(coins, my_turn)
+        expected.append(coins[8:].sum())
+        for _ in range(num_players - 1):
+            coins = np.convolve(coins, other_turn)
+    assert np.allclose(income.probability_to_afford(hand, num_players, 10, 6, False, coins=2), expected)
@@ -0,0 +1,16 @@
+import math
+
+import pytest
+
+from analysis import markov, monte_carlo
+from analysis.strategies import highest_margin
+
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_monte_carlo_mean_matches_markov_expectation(num_players):
+    exact = markov.rounds_to_win(highest_margin(), num_players)
+    assert exact.probabilities.sum() + exact.unfinished == pytest.approx(1)
+
+    sampled = monte_carlo.simulate(highest_margin(), num_players, 20_000, seed=num_players)
+    assert sampled.unfinished == 0
+    # Within five standard errors, which a correct engine fails about once in two million runs.
+    assert abs(sampled.mean() - exact.mean()) < 5 * sampled.std() / math.sqrt(sampled.num_games)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from analysis import monte_carlo
+from analysis.strategies import VICTORY_CARDS, BuildOrder, InvalidStrategyError, Strategy, highest_margin, roll_two_never
+
+def test_same_seed_plays_the_same_games():
+    first = monte_carlo.simulate(highest_margin(), 4, 2000, seed=1)
+    second = monte_carlo.simulate(highest_margin(), 4, 2000, seed=1)
+    assert np.array_equal(first.counts, second.counts)
+    assert first.unfinished == second.unfinished
+
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+def test_every_game_is_counted(num_players):
+    result = monte_carlo.simulate(highest_margin(), num_players, 3000, seed=num_players)
+    assert result.num_games == 3000
+    assert result.distribution().sum() + result.unfinished_rate() == pytest.approx(1)
+    # Nobody wins before they have had the turns to buy all four victory cards.
+    assert not result.counts[:len(VICTORY_CARDS)].any()
+
+def test_rejects_build_order_without_victory_cards():
+    build_order = [card for card in highest_margin().buy.cards if card not in VICTORY_CARDS]
+    with pytest.raises(InvalidStrategyError):
+        monte_carlo.simulate(Strategy(buy=BuildOrder(build_order), roll_two=roll_two_never), 2, 10)
+
+def test_rejects_strategy_without_build_order():
+    with pytest.raises(TypeError):
+        monte_carlo.simulate(Strategy(buy=lambda player_state, round_number: None, roll_two=roll_two_never), 2, 10)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from analysis import multiplayer
+from analysis.strategies import highest_margin
+
+def test_transfers_conserve_coins():
+    rng = np.random.default_rng(0)
+    coins = rng.integers(0, 10, size=(1000, 4)).astype(np.int32)
+    total = coins.sum(axis=1)
+    for payer, payee in [(0, 1), (2, 0), (3, 2), (1, 3)]:
+        # Ask for more than some players have, as red and purple cards can.
+        multiplayer._transfer(coins, payer, payee, rng.integers(0, 15, size=1000).astype(np.int32))
+        assert np.array_equal(coins.sum(axis=1), total)
+        assert (coins >= 0).all()
+
+def test_every_game_has_a_winner():
+    results = multiplayer.simulate([highest_margin() for _ in range(3)], 2000, seed=0)
+    assert results.num_games == 2000
+    assert results.unfinished_rate() == 0
+    assert results.win_rates().sum() == 1
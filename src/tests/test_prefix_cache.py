@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from analysis import strategies
+from analysis.prefix_cache import SimulationCache
+from analysis.strategies import NAMED_STRATEGIES, StrategySpec
+from machi_koro import cards
+
+@pytest.mark.parametrize("num_players", [2, 4])
+@pytest.mark.parametrize("max_snapshots", [100_000, 5])
+def test_simulation_cache_matches_simulate(num_players, max_snapshots):
+    cache = SimulationCache(num_players, max_snapshots=max_snapshots)
+    specs = [StrategySpec.from_strategy(f()) for f in NAMED_STRATEGIES.values()]
+    # Variants that share a prefix with a named strategy and then go their own way.
+    specs += [StrategySpec(spec.build_order[:len(spec.build_order) // 2] + spec.build_order[::-1], spec.roll_two) for spec in specs]
+    for spec in specs:
+        expected = strategies.simulate(spec.to_strategy(), num_players, log="array").rows
+        assert np.array_equal(cache.simulate(spec, log="array").rows, expected)
+    assert cache.turns_skipped > 0
+    assert len(cache) <= max_snapshots
+
+def test_simulation_cache_rejects_build_order_without_victory_cards():
+    spec = StrategySpec.from_strategy(NAMED_STRATEGIES["highest_margin"]())
+    spec = StrategySpec(tuple(i for i in spec.build_order if cards.distinct_cards[i] not in strategies.VICTORY_CARDS), spec.roll_two)
+    with pytest.raises(strategies.InvalidStrategyError):
+        SimulationCache(2).simulate(spec, log="array")
@@ -0,0 +1,22 @@
+import pytest
+
+from analysis import racing
+from analysis.strategies import buy_nothing, highest_margin
+
+def test_drops_a_clearly_slower_candidate():
+    result = racing.race({"highest_margin": highest_margin, "buy_nothing": buy_nothing}, 2, seed=0)
+    assert result.decided
+    assert result.winner.name == "highest_margin"
+    assert [c.name for c in result.survivors] == ["highest_margin"]
+    # It takes far fewer games to tell them apart than to play both to the end.
+    assert result.games < result.fixed_games
+
+def test_single_candidate_plays_one_batch():
+    result = racing.race({"highest_margin": highest_margin}, 2, batch_size=100, seed=0)
+    assert result.winner.games == 100
+    assert len(result.to_dataframe()) == 1
+
+@pytest.mark.parametrize("batch_size, max_games", [(0, 100), (-1, 100), (100, 0), (100, -5)])
+def test_rejects_non_positive_batch_size_or_max_games(batch_size, max_games):
+    with pytest.raises(ValueError):
+        racing.race({"highest_margin": highest_margin}, 2, batch_size=batch_size, max_games=max_games)
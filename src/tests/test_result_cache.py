@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pytest
+
+from analysis import result_cache, strategies
+from analysis.result_cache import ResultCache
+
+@pytest.mark.parametrize("corrupt", [b"", b"not zlib at all", None])
+def test_corrupt_entry_is_a_miss_and_is_deleted(tmp_path, corrupt):
+    cache = ResultCache(str(tmp_path))
+    cache.put("key", np.arange(10))
+    path = os.path.join(str(tmp_path), "key.bin")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        # None cuts the entry off halfway through.
+        f.write(corrupt if corrupt is not None else data[:len(data) // 2])
+
+    assert cache.get("key") is None
+    assert cache.misses == 1
+    assert not os.path.exists(path)
+
+def test_simulate_recomputes_a_corrupt_entry(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    strategy = strategies.highest_margin()
+    expected = result_cache.simulate(strategy, 2, log="summary", cache=cache)
+    for entry in os.scandir(str(tmp_path)):
+        with open(entry.path, "wb") as f:
+            f.write(b"\x00")
+
+    assert result_cache.simulate(strategies.highest_margin(), 2, log="summary", cache=cache) == expected
+    assert result_cache.simulate(strategies.highest_margin(), 2, log="summary", cache=cache) == expected
+    assert cache.hits == 1
@@ -0,0 +1,22 @@
+import pytest
+
+from analysis import search, strategies
+
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+@pytest.mark.parametrize("roll_two, max_copies", [("never", 2), ("always_after_train_station", 1)])
+def test_optimum_is_reproduced_by_simulate(num_players, roll_two, max_copies):
+    result = search.optimal_build_order(num_players, roll_two, max_copies)
+    game_log = strategies.simulate(result.strategy.to_strategy(), num_players)
+    assert game_log["Round"].iloc[-1] == result.rounds_to_win
+
+def test_coins_landing_exactly_on_a_cost_are_added_up_like_simulate():
+    # Counting coins exactly, a 19 round build order is found here that `strategies.simulate` takes 20 rounds to play,
+    # since its floating point coins fall just short of a card's cost.
+    result = search.optimal_build_order(3, "never", 1)
+    summary = strategies.simulate(result.strategy.to_strategy(), 3, log="summary")
+    assert summary.rounds_to_win == result.rounds_to_win
+
+def test_upper_bound_below_the_optimum_finds_nothing():
+    result = search.optimal_build_order(2, "never", 1)
+    with pytest.raises(ValueError):
+        search.optimal_build_order(2, "never", 1, upper_bound=result.rounds_to_win - 1)
@@ -0,0 +1,15 @@
+from analysis.strategies import StrategySpec, tournament_jobs
+
+SPECS = {"a": StrategySpec((1, 2), "never"), "b": StrategySpec((3, 4), "never")}
+
+def test_tournament_jobs_accepts_generators():
+    jobs = tournament_jobs(SPECS, (n for n in (2, 3)), (p for p in ("never", "always_after_train_station")))
+    assert sorted((job.name, job.strategy.roll_two, job.num_players) for job in jobs) == sorted(
+        (name, policy, num_players)
+        for name in SPECS
+        for policy in ("never", "always_after_train_station")
+        for num_players in (2, 3))
+
+def test_tournament_jobs_keeps_own_dice_policy_without_any_given():
+    jobs = tournament_jobs(SPECS, [2], iter(()))
+    assert [(job.name, job.strategy) for job in jobs] == list(SPECS.items())